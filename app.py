@@ -1,11 +1,18 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import db_utils as db
 import pdf_utils as pdf_gen
+import job_utils as jobs
 import email_utils
 import auth_utils as auth
+import schema_utils
+import perf_utils as perf
 import base64
+import contextlib
+import functools
 import random
+import time
 import warnings
 import sqlite3
 
@@ -13,54 +20,523 @@ import sqlite3
 warnings.filterwarnings("ignore")
 
 # ==========================================
-# 🛠️ SELF-HEALING DATABASE FUNCTION
+# ⏱️ INSTRUMENTATION
 # ==========================================
+# Every run is timed section by section, with the SQL statements and rows
+# each section needed (see perf_utils). HODs see the breakdown in the
+# sidebar; every run is also appended to the perf log.
+page_run = perf.RunProfile("page")
+st.session_state["perf_run"] = page_run
+
+@contextlib.contextmanager
+def timed(name):
+    """A section of the current page run; in a fragment rerun, a run of its own."""
+    run = st.session_state.get("perf_run")
+    if run is not None and not run.finished:
+        with run.section(name):
+            yield
+        return
+    run = perf.RunProfile("fragment", role=st.session_state.get("role"), user_id=st.session_state.get("user_id"))
+    try:
+        with run.section(name):
+            yield
+    finally:
+        run.finish()
+
+def timed_panel(name):
+    """Decorator form of timed(), for the fragment panels."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# ==========================================
+# 🚀 STARTUP (ONCE PER SERVER PROCESS)
+# ==========================================
+# Streamlit reruns this file on every interaction of every session. Work
+# that only depends on the deployment (the schema check, the encoded
+# background) lives in st.cache_resource functions: it runs on the first
+# page view after the server starts and is shared by all sessions after that.
+
+@st.cache_resource(show_spinner=False)
+def get_database():
+    """The storage engine, shared by every session. Migrates only when the schema version is behind."""
+    started = time.perf_counter()
+    engine = db.get_engine()
+    conn = db.get_connection()
+    version = schema_utils.get_schema_version(conn)
+    if version < schema_utils.LATEST_VERSION:
+        # Creates missing tables/indexes; the schema itself lives in schema_utils
+        version = schema_utils.migrate(conn)
+    conn.close()
+    print(f"🚀 Database ready (schema v{version}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return engine
+
 def ensure_database_integrity():
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        # Ensure tables exist
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS leave_balance (
-            faculty_id INTEGER PRIMARY KEY,
-            cl_balance INTEGER DEFAULT 10, sl_balance INTEGER DEFAULT 5, el_balance INTEGER DEFAULT 2
-        )""")
-        
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS teaching_progress (
-            record_id INTEGER PRIMARY KEY AUTOINCREMENT, faculty_id INTEGER, 
-            week_number INTEGER, teacher_completion_pct INTEGER, 
-            student_avg_pct INTEGER, class_verdict TEXT
-        )""")
-        conn.commit()
-        conn.close()
+        get_database()  # a failure is not cached, so the next rerun retries
     except Exception as e:
         st.error(f"⚠️ Database Repair Failed: {e}")
 
-ensure_database_integrity()
+with timed("Database check"):
+    ensure_database_integrity()
+
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    """Background job workers (see job_utils), started once per server process."""
+    get_database()  # the jobs table comes with the schema
+    return jobs.start_runner()
+
+with timed("Job runner"):
+    try:
+        get_job_runner()
+    except Exception as e:
+        st.error(f"⚠️ Background jobs unavailable: {e}")
 
 # ==========================================
 # ⚙️ PAGE CONFIGURATION
 # ==========================================
 st.set_page_config(page_title="EduHR-Gen Portal", layout="wide", page_icon="🎓")
 
-def add_bg_from_local(image_file):
+@st.cache_resource(show_spinner=False)
+def get_background_css(image_file):
+    """The background <style> block with the image inlined, encoded once ("" if there is no image)."""
     try:
-        with open(image_file, "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read())
-        st.markdown(
-        f"""<style>
-        .stApp {{ background-image: url(data:image/{"png"};base64,{encoded_string.decode()}); background-size: cover; }} 
+        with open(image_file, "rb") as f:
+            encoded_string = base64.b64encode(f.read()).decode()
+    except FileNotFoundError:
+        return ""
+    return f"""<style>
+        .stApp {{ background-image: url(data:image/png;base64,{encoded_string}); background-size: cover; }} 
         .stMarkdown, .stText, h1, h2, h3, p, label {{ 
             text-shadow: 0px 0px 3px rgba(255, 255, 255, 0.8); 
             font-weight: 500;
         }} 
-        </style>""", unsafe_allow_html=True)
-    except FileNotFoundError:
-        pass 
+        </style>"""
+
+def add_bg_from_local(image_file):
+    css = get_background_css(image_file)
+    if css:
+        st.markdown(css, unsafe_allow_html=True)
+
+with timed("Background CSS"):
+    add_bg_from_local('background.jpg')
+
+# ==========================================
+# 📄 PAGED TABLES
+# ==========================================
+def color_status(val):
+    color = 'orange' if val == 'Pending' else ('green' if val == 'Approved' else 'red')
+    return f'color: {color}; font-weight: bold'
+
+def show_paged_table(key, fetch_page, total, hide=(), columns=None):
+    """
+    Renders one keyset page from fetch_page(cursor=..., direction=...) with
+    Newer/Older buttons. The cursor lives in st.session_state[key], so only
+    the rows on screen are ever fetched.
+    """
+    cursor, direction, page_no = st.session_state.get(key, (None, "next", 1))
+    page = fetch_page(cursor=cursor, direction=direction)
+    if page.rows.empty and cursor is not None:
+        # Cursor no longer valid (e.g. rows changed) -> back to the newest page
+        cursor, direction, page_no = st.session_state[key] = (None, "next", 1)
+        page = fetch_page(cursor=cursor, direction=direction)
+
+    with timed("Paged table"):
+        rows = page.rows[columns] if columns else page.rows.drop(columns=list(hide))
+        if 'status' in rows.columns:
+            st.dataframe(rows.style.map(color_status, subset=['status']), hide_index=True, use_container_width=True)
+        else:
+            st.dataframe(rows, hide_index=True, use_container_width=True)
+
+    def go(new_cursor, new_direction, new_page_no):
+        st.session_state[key] = (new_cursor, new_direction, new_page_no)
+
+    pages = max(1, -(-total // db.PAGE_SIZE))
+    c1, c2, c3 = st.columns([1, 2, 1])
+    c1.button("◀ Newer", key=f"{key}_newer", disabled=not page.has_prev,
+              on_click=go, args=(page.first_key, "prev", page_no - 1))
+    c2.caption(f"Page {page_no} of {pages} · {total} records")
+    c3.button("Older ▶", key=f"{key}_older", disabled=not page.has_next,
+              on_click=go, args=(page.last_key, "next", page_no + 1))
+
+# ==========================================
+# 🧊 CACHED DATA
+# ==========================================
+# Streamlit reruns this whole script on every interaction, so every read
+# below goes through st.cache_data: switching tabs or flipping a toggle
+# reuses the last results. The app's own writes clear the caches at once.
+# Changes made outside the app (job_worker.py, the import scripts) show up
+# once an entry is older than the TTL: the reload then reaches db_utils,
+# whose query cache has noticed the outside commit (PRAGMA data_version).
+DATA_TTL = 300
+
+@st.cache_resource(ttl=DATA_TTL, show_spinner=False)
+def load_faculty_directory():
+    """The shared, read-only FacultyDirectory (a resource, so reruns get it without a copy)."""
+    return db.get_faculty_directory()
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_leave_balance(faculty_id):
+    return db.get_leave_balance(faculty_id)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_leave_history_count(faculty_id):
+    return db.count_leave_history(faculty_id)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_leave_history_page(faculty_id, cursor=None, direction="next"):
+    return db.get_leave_history_page(faculty_id, cursor=cursor, direction=direction)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_pending_leaves():
+    return db.get_pending_leaves()
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_past_leaves_count():
+    return db.count_past_leaves()
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_past_leaves_page(cursor=None, direction="next"):
+    return db.get_all_past_leaves_page(cursor=cursor, direction=direction)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_feedback_summary(faculty_id):
+    return db.get_feedback_summary(faculty_id)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_course_feedback_stats(faculty_id):
+    return db.get_course_feedback_stats(faculty_id)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_feedback_page(faculty_id, cursor=None, direction="next"):
+    return db.get_student_feedback_page(faculty_id, cursor=cursor, direction=direction)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_appraisal_score(faculty_id):
+    return db.calculate_appraisal_score(faculty_id)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_teaching_progress(faculty_id):
+    return db.get_teaching_progress(faculty_id)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_department_overview(department=None):
+    return db.get_department_overview(department)
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_department_summary():
+    return db.get_department_summary()
+
+def refresh_leave_data():
+    """Call after a leave is submitted, approved or rejected."""
+    for loader in (load_leave_balance, load_leave_history_count, load_leave_history_page,
+                   load_pending_leaves, load_past_leaves_count, load_past_leaves_page,
+                   load_department_overview, load_department_summary):
+        loader.clear()
+
+# The tables behind each loader (as declared by the db_utils functions it calls)
+LOADER_TABLES = {
+    load_faculty_directory: ("faculty_master",),
+    load_leave_balance: ("leave_ledger",),
+    load_leave_history_count: ("leave_records",),
+    load_leave_history_page: ("leave_records",),
+    load_pending_leaves: ("leave_records", "faculty_master"),
+    load_past_leaves_count: ("leave_records",),
+    load_past_leaves_page: ("leave_records", "faculty_master"),
+    load_feedback_summary: ("student_feedback",),
+    load_course_feedback_stats: ("student_feedback",),
+    load_feedback_page: ("student_feedback",),
+    load_appraisal_score: ("student_feedback", "research_records"),
+    load_teaching_progress: ("teaching_progress",),
+    load_department_overview: ("faculty_master", "student_feedback", "research_records",
+                               "leave_ledger", "teaching_progress"),
+    load_department_summary: ("faculty_master", "student_feedback", "research_records",
+                              "leave_ledger", "teaching_progress"),
+}
+
+def refresh_tables(*tables):
+    """Clears only the loaders that read one of `tables` (the caches are shared by every session)."""
+    db.invalidate_tables(*tables)
+    for loader, read in LOADER_TABLES.items():
+        if set(read) & set(tables):
+            loader.clear()
+
+# ==========================================
+# ⏳ BACKGROUND JOBS
+# ==========================================
+# Reports, digests, exports and data fixes run as jobs (see job_utils), so
+# a click only queues work and the script run ends at once. While a job is
+# queued or running, its status is a fragment that polls the jobs table;
+# when the job ends, one full rerun swaps in the final view.
+JOB_POLL_SECONDS = 2
+
+def watch_job(job_id):
+    """Remembers a job this session saw queued or running, to refresh once it ends."""
+    st.session_state.setdefault("watched_jobs", set()).add(job_id)
+
+def refresh_after_job(job):
+    """
+    When a job this session watched has ended, clears the cached views of the
+    tables its kind writes (it may have run in another process). Returns True
+    if it did. Jobs first seen finished, e.g. old ones in the sidebar, refresh nothing.
+    """
+    watched = st.session_state.setdefault("watched_jobs", set())
+    if job.active or job.job_id not in watched:
+        return False
+    watched.discard(job.job_id)
+    kind = jobs.JOB_KINDS.get(job.kind)
+    if not (kind and kind.tables):
+        return False
+    refresh_tables(*kind.tables)
+    return True
+
+def show_job(job, place):
+    """Status line of one job; a download button once its file is ready."""
+    if job.active:
+        watch_job(job.job_id)
+    elif refresh_after_job(job):
+        st.rerun()  # views above this one may have been drawn from the old data
+    kind = jobs.JOB_KINDS.get(job.kind)
+    label = kind.label if kind else job.kind
+    if job.status == "queued":
+        st.info(f"{label}: waiting in queue (job #{job.job_id})")
+    elif job.status == "running":
+        st.progress(job.progress / job.total if job.total else 0.0,
+                    text=f"{label}: {job.message or 'running'} ({job.progress}/{job.total})")
+    elif job.status == "done":
+        st.success(f"{label}: {job.message}")
+        data = jobs.read_artifact(job)
+        if data is not None:
+            st.download_button(f"⬇️ Download {job.artifact_name}", data, file_name=job.artifact_name,
+                               mime=job.artifact_mime, key=f"{place}_download_{job.job_id}",
+                               on_click=jobs.mark_downloaded, args=(job.job_id,))
+    elif job.status == "failed":
+        st.error(f"{label} failed: {job.message}")
+    else:
+        st.caption(f"{label}: {job.status}")
+    if job.active:
+        st.button("✖️ Cancel", key=f"{place}_cancel_{job.job_id}", on_click=db.cancel_job, args=(job.job_id,))
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def live_job_status(job_id, place):
+    job = db.get_job(job_id)
+    if job is None or not job.active:
+        if job is not None:
+            refresh_after_job(job)
+        st.rerun()  # full run: shows the final state without polling
+    show_job(job, place)
+
+def job_status(job, place):
+    if job.active:
+        live_job_status(job.job_id, place)
+    else:
+        show_job(job, place)
+
+def job_panel(key, kind, label, **params):
+    """A button that queues a job, then that job's status and download in place."""
+    started = st.session_state.setdefault("started_jobs", {})
+    if st.button(label, key=f"{key}_button"):
+        started[key] = jobs.submit(kind, owner=st.session_state.get("user_id"), **params)
+        watch_job(started[key])
+    job = db.get_job(started[key]) if key in started else None
+    if job is not None:
+        job_status(job, key)
+
+# ==========================================
+# 🧩 PANELS (FRAGMENTS)
+# ==========================================
+# Each panel is an st.fragment: a click inside it reruns only that panel,
+# not the whole page. Panels read through the cached loaders above and
+# rerun themselves (scope="fragment") after a write.
+
+def rerun_panel():
+    """Reruns the calling fragment; when it ran as part of a full page run, reruns the page."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+@st.fragment
+@timed_panel("Leave form")
+def leave_portal(faculty_id, faculty_name):
+    """Faculty view of Tab 1: balance, new request form and history."""
+    col1, col2 = st.columns([1, 2], gap="medium")
+
+    # 1. Balance
+    with col1:
+        st.info("📊 Current Leave Balance")
+        balance = load_leave_balance(faculty_id)
+        st.dataframe(balance, hide_index=True, use_container_width=True)
+
+    # 2. Apply Form
+    with col2:
+        st.warning("📝 New Leave Request")
+        email_needed = st.toggle("📧 Generate Email Draft for HOD?", value=False)
+
+        # Outcome of the last submit, kept across the panel rerun
+        result = st.session_state.pop("leave_result", None)
+        if result:
+            success, msg, draft = result
+            (st.success if success else st.error)(msg)
+            if draft:
+                st.markdown("---")
+                st.info("📋 **Copy this email to send to your HOD:**")
+                st.code(draft, language="markdown")
+
+        with st.form("leave_form"):
+            col_a, col_b = st.columns(2)
+            l_type = col_a.selectbox("Leave Type", ["CL", "SL", "EL", "OD"])
+            days = col_b.number_input("Days Requested", min_value=1, max_value=30)
+            reason = st.text_area("Reason for Leave")
+
+            if st.form_submit_button("Submit Request"):
+                success, msg = db.apply_for_leave(faculty_id, l_type, days)
+                draft = None
+                if success:
+                    refresh_leave_data()
+                    if email_needed:
+                        draft = email_utils.generate_leave_application_email(
+                            faculty_name, l_type, days, reason, faculty=load_faculty_directory().get(faculty_id))
+                st.session_state["leave_result"] = (success, msg, draft)
+                rerun_panel()  # redraw the balance and history with the new request
+
+    # History
+    st.divider()
+    st.subheader("📜 My Leave History")
+    history_total = load_leave_history_count(faculty_id)
+    if history_total:
+        show_paged_table(f"history_{faculty_id}",
+                         lambda **kw: load_leave_history_page(faculty_id, **kw),
+                         history_total, hide=["leave_id"])
+    else:
+        st.write("No leave records found.")
+
+@st.fragment
+@timed_panel("Approval queue")
+def approval_queue():
+    """HOD Tab 5: filterable pending queue with batch decisions, plus past decisions."""
+    st.subheader("HOD Approval Portal")
+    if "queue_result" in st.session_state:
+        st.success(st.session_state.pop("queue_result"))
+
+    pending = load_pending_leaves()
+    if not pending.empty:
+        # 1. Filters
+        f1, f2, f3 = st.columns(3)
+        types = f1.multiselect("Leave Type", sorted(pending['type'].dropna().unique()))
+        depts = f2.multiselect("Department", sorted(pending['department'].dropna().unique()))
+        lo, hi = int(pending['days_requested'].min()), int(pending['days_requested'].max())
+        days = f3.slider("Days Requested", lo, hi, (lo, hi)) if hi > lo else (lo, hi)
+
+        mask = pending['days_requested'].between(*days)
+        if types:
+            mask &= pending['type'].isin(types)
+        if depts:
+            mask &= pending['department'].isin(depts)
+        matching = pending[mask].reset_index(drop=True)
+
+        # 2. Multi-select (a new key after each batch drops the old selection)
+        st.caption(f"{len(matching)} of {len(pending)} pending requests match · select rows to decide on them")
+        queue_round = st.session_state.get("queue_round", 0)
+        table = st.dataframe(matching.drop(columns=['status']), hide_index=True, use_container_width=True,
+                             on_select="rerun", selection_mode="multi-row", key=f"queue_{queue_round}")
+        chosen = [matching['leave_id'][i] for i in table.selection.rows if i < len(matching)]
+
+        # 3. Batch actions, applied in one transaction
+        b1, b2, b3, b4 = st.columns(4)
+        decisions = None
+        if b1.button(f"✅ Approve Selected ({len(chosen)})", disabled=not chosen):
+            decisions = [(leave_id, "Approved") for leave_id in chosen]
+        if b2.button(f"❌ Reject Selected ({len(chosen)})", disabled=not chosen):
+            decisions = [(leave_id, "Rejected") for leave_id in chosen]
+        if b3.button(f"✅ Approve All Matching ({len(matching)})", disabled=matching.empty):
+            decisions = [(leave_id, "Approved") for leave_id in matching['leave_id']]
+        if b4.button(f"❌ Reject All Matching ({len(matching)})", disabled=matching.empty):
+            decisions = [(leave_id, "Rejected") for leave_id in matching['leave_id']]
+
+        if decisions:
+            outcomes = pd.Series(db.apply_leave_decisions(decisions)).value_counts()
+            refresh_leave_data()
+            st.session_state["queue_round"] = queue_round + 1
+            st.session_state["queue_result"] = " · ".join(f"{n} {outcome}" for outcome, n in outcomes.items())
+            rerun_panel()
+    else:
+        st.success("No pending requests.")
+
+    with st.expander("📜 Past Decisions"):
+        past_total = load_past_leaves_count()
+        if past_total:
+            show_paged_table("past_leaves", load_past_leaves_page, past_total, hide=["leave_id"])
+        else:
+            st.write("No decisions yet.")
+
+@st.fragment
+@timed_panel("Teaching chart")
+def teaching_tracker(faculty_id):
+    """Tab 6: weekly syllabus completion."""
+    st.subheader("Teaching Tracker")
+    tp = load_teaching_progress(faculty_id)
+    if not tp.empty:
+        curr = tp.iloc[-1]
+        st.metric(f"Week {curr['week_number']} Completion", f"{curr['teacher_completion_pct']}%")
+        st.line_chart(tp.set_index("week_number")['teacher_completion_pct'])
+    else:
+        st.info("Initializing tracker...")
+
+@st.fragment
+@timed_panel("Department overview")
+def department_overview():
+    """HOD Tab 7: every faculty member's key numbers, from a few grouped queries."""
+    st.subheader("🏢 Department Overview")
+    summary = load_department_summary()
+    dept = st.selectbox("Department", ["All Departments"] + summary['department'].dropna().tolist())
+
+    if dept == "All Departments":
+        overview = load_department_overview()
+        st.dataframe(summary.rename(columns={
+            'department': 'Department', 'faculty': 'Faculty', 'avg_rating': 'Avg Rating',
+            'avg_score': 'Avg Score', 'teaching_lag_pct': 'Teaching Lag %',
+            'leave_utilisation_pct': 'Leave Used %'}), hide_index=True, use_container_width=True)
+    else:
+        overview = load_department_overview(dept)
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Avg Rating", f"{overview['avg_rating'].mean():.2f}/5" if overview['avg_rating'].notna().any() else "-")
+    c2.metric("Avg Appraisal Score", f"{overview['total'].mean():.1f}/100")
+    c3.metric("Leave Utilisation", f"{overview['leave_used'].sum() / overview['leave_allowed'].sum() * 100:.1f}%")
+    c4.metric("Avg Teaching Lag", f"{overview['teaching_lag_pct'].mean():.1f} pts"
+              if overview['teaching_lag_pct'].notna().any() else "-")
+
+    st.dataframe(
+        overview[['rank', 'name', 'department', 'avg_rating', 'total', 'leave_utilisation_pct', 'teaching_lag_pct']],
+        hide_index=True, use_container_width=True,
+        column_config={
+            'rank': 'Rank', 'name': 'Name', 'department': 'Department',
+            'avg_rating': st.column_config.NumberColumn('Avg Rating', format="%.2f"),
+            'total': st.column_config.ProgressColumn('Appraisal Score', min_value=0, max_value=100, format="%d"),
+            'leave_utilisation_pct': st.column_config.NumberColumn('Leave Used %', format="%.1f"),
+            'teaching_lag_pct': st.column_config.NumberColumn('Teaching Lag %', format="%.1f"),
+        })
 
-add_bg_from_local('background.jpg') 
+    scope = None if dept == "All Departments" else dept
+
+    # Built by background jobs; the files stay downloadable after leaving the page
+    slug = jobs.scope_slug(scope)
+    st.markdown("#### 📑 Department Digest")
+    # Multi-page digest of the selection: ranking, charts and one panel per person
+    job_panel(f"digest_{slug}", "department_digest", "📑 Prepare Digest PDF", department=scope)
+
+    st.markdown("#### 📦 Appraisal Reports")
+    # Every report of the selection in one ZIP, rendered by a process pool
+    job_panel(f"reports_{slug}", "department_reports", f"📦 Generate All Reports ({len(overview)})",
+              department=scope)
+
+    st.markdown("#### 📊 Export")
+    job_panel(f"export_{slug}", "overview_export", "📊 Export Overview CSV", department=scope)
 
 # ==========================================
 # 🔐 AUTHENTICATION
@@ -81,49 +557,65 @@ st.title("🎓 EduHR-Gen: Academic HR Assistant")
 st.sidebar.header("User Panel")
 st.sidebar.markdown(f"**Logged in as:** {current_role}")
 
-faculty_names = db.get_faculty_names()
+with timed("Faculty directory"):
+    directory = load_faculty_directory()
 
-if faculty_names.empty:
+if not len(directory):
     st.error("⚠️ Database is empty!")
     st.stop()
 
 if current_role == "HOD":
+    # Narrow the picker by department and by name (or surname) prefix
+    dept_filter = st.sidebar.selectbox("Department", ["All Departments"] + directory.departments)
+    name_query = st.sidebar.text_input("Search by name")
+    matches = directory.search(name_query)
+    if dept_filter != "All Departments":
+        matches = [p for p in matches if p.department == dept_filter]
+    if not matches:
+        st.sidebar.warning("No faculty match the search.")
+        st.stop()
+
     # Show ID in dropdown to avoid confusion
-    faculty_dict = dict(zip(faculty_names['name'] + " (ID: " + faculty_names['faculty_id'].astype(str) + ")", faculty_names['faculty_id']))
-    
-    selected_label = st.sidebar.selectbox("Select Faculty Member", list(faculty_dict.keys()))
-    faculty_id = faculty_dict[selected_label]
-    selected_faculty = faculty_names[faculty_names['faculty_id'] == faculty_id]['name'].values[0]
+    faculty_id = st.sidebar.selectbox("Select Faculty Member", [p.faculty_id for p in matches],
+                                      format_func=directory.label)
+    selected_faculty = directory.name_of(faculty_id)
 
 else:
     faculty_id = user_id
-    try:
-        my_name = faculty_names[faculty_names['faculty_id'] == faculty_id]['name'].values[0]
-        st.sidebar.info(f" Viewing Profile: **{my_name}**")
-        selected_faculty = my_name
-    except IndexError:
+    my_name = directory.name_of(faculty_id)
+    if my_name is None:
         st.error("❌ Error: Your Faculty ID was not found.")
         st.stop()
+    st.sidebar.info(f" Viewing Profile: **{my_name}**")
+    selected_faculty = my_name
+
+# The user's recent jobs, wherever they were started
+with timed("Jobs list"), st.sidebar.expander("⏳ Background Jobs"):
+    recent_jobs = db.list_jobs(str(user_id), limit=5)
+    for job in recent_jobs:
+        job_status(job, "sidebar")
+    if not recent_jobs:
+        st.caption("No jobs yet.")
 
 # ==========================================
 # 📑 TABS (Chatbot Removed)
 # ==========================================
 if current_role == "HOD":
-    t1, t2, t3, t4, t5, t6 = st.tabs([
+    t1, t2, t3, t4, t5, t6, t7 = st.tabs([
         "📝 Leave Portal", "📊 Feedback Analytics", "⭐ Sentiment AI", 
-        "📈 Performance", "🔒 HOD Dashboard", "📚 Teaching Tracker"
+        "📈 Performance", "🔒 HOD Dashboard", "📚 Teaching Tracker", "🏢 Department Overview"
     ])
 else:
     t1, t2, t3, t4, t6 = st.tabs([
         "📝 Leave Portal", "📊 Feedback Analytics", "⭐ Sentiment AI", 
         "📈 Performance", "📚 Teaching Tracker"
     ])
-    t5 = None
+    t5 = t7 = None
 
 # ==========================================
 # 📝 TAB 1: LEAVES (HOD READ-ONLY)
 # ==========================================
-with t1:
+with t1, timed("📝 Leave Portal"):
     st.subheader(f"Leave Profile: {selected_faculty}")
 
     # --- HOD VIEW (Read Only) ---
@@ -132,170 +624,141 @@ with t1:
         
         # 1. Balance Table
         st.markdown("### 📊 Current Balance")
-        balance = db.get_leave_balance(faculty_id)
+        balance = load_leave_balance(faculty_id)
         st.dataframe(balance, hide_index=True, use_container_width=True)
 
         # 2. History Table
         st.divider()
         st.markdown("### 📜 Leave Application History")
-        history = db.get_leave_history(faculty_id)
+        history_total = load_leave_history_count(faculty_id)
         
-        if not history.empty:
-            def color_status(val):
-                color = 'orange' if val == 'Pending' else ('green' if val == 'Approved' else 'red')
-                return f'color: {color}; font-weight: bold'
-            st.dataframe(history.style.applymap(color_status, subset=['status']), use_container_width=True)
+        if history_total:
+            show_paged_table(f"history_{faculty_id}",
+                             lambda **kw: load_leave_history_page(faculty_id, **kw),
+                             history_total, hide=["leave_id"])
         else:
             st.write("No leave records found for this faculty.")
 
     # --- FACULTY VIEW (Can Apply) ---
     else:
-        col1, col2 = st.columns([1, 2], gap="medium")
-        
-        # 1. Balance
-        with col1:
-            st.info("📊 Current Leave Balance")
-            balance = db.get_leave_balance(faculty_id)
-            st.dataframe(balance, hide_index=True, use_container_width=True)
-
-        # 2. Apply Form
-        with col2:
-            st.warning("📝 New Leave Request")
-            email_needed = st.toggle("📧 Generate Email Draft for HOD?", value=False)
-            
-            with st.form("leave_form"):
-                col_a, col_b = st.columns(2)
-                l_type = col_a.selectbox("Leave Type", ["CL", "SL", "EL", "OD"])
-                days = col_b.number_input("Days Requested", min_value=1, max_value=30)
-                reason = st.text_area("Reason for Leave")
-                
-                if st.form_submit_button("Submit Request"):
-                    success, msg = db.apply_for_leave(faculty_id, l_type, days)
-                    if success:
-                        st.success(msg)
-                        if email_needed:
-                            draft = email_utils.generate_leave_application_email(
-                                selected_faculty, l_type, days, reason
-                            )
-                            st.markdown("---")
-                            st.info("📋 **Copy this email to send to your HOD:**")
-                            st.code(draft, language="markdown")
-                    else:
-                        st.error(msg)
-        
-        # History
-        st.divider()
-        st.subheader("📜 My Leave History")
-        history = db.get_leave_history(faculty_id)
-        if not history.empty:
-            def color_status(val):
-                color = 'orange' if val == 'Pending' else ('green' if val == 'Approved' else 'red')
-                return f'color: {color}; font-weight: bold'
-            st.dataframe(history.style.applymap(color_status, subset=['status']), use_container_width=True)
-        else:
-            st.write("No leave records found.")
+        leave_portal(faculty_id, selected_faculty)
 
 # ==========================================
 # 📊 TAB 2: FEEDBACK
 # ==========================================
-with t2:
+with t2, timed("📊 Feedback Analytics"):
     st.subheader("📊 Feedback Analysis")
-    f_df = db.get_student_feedback(faculty_id)
-    if not f_df.empty:
+    # Pre-aggregated counts (feedback_stats), not every review row
+    f_stats = load_feedback_summary(faculty_id)
+    if f_stats.review_count:
         c1, c2 = st.columns(2)
-        c1.metric("Avg Rating", f"{f_df['rating'].mean():.1f}/5")
-        c2.metric("Reviews", len(f_df))
-        st.bar_chart(f_df['rating'].value_counts())
+        c1.metric("Avg Rating", f"{f_stats.avg_rating:.1f}/5" if f_stats.avg_rating is not None else "-")
+        c2.metric("Reviews", f_stats.review_count)
+        st.bar_chart(pd.Series({r: n for r, n in f_stats.rating_counts.items() if n}, name="count"))
+        st.dataframe(load_course_feedback_stats(faculty_id), hide_index=True, use_container_width=True)
         
         st.divider()
-        st.dataframe(f_df[['course_name', 'rating', 'feedback_comment', 'sentiment_label']], use_container_width=True)
+        show_paged_table(f"feedback_{faculty_id}",
+                         lambda **kw: load_feedback_page(faculty_id, **kw),
+                         f_stats.review_count,
+                         columns=['course_name', 'rating', 'feedback_comment', 'sentiment_label'])
     else:
         st.info("No feedback data found.")
 
 # ==========================================
 # ⭐ TAB 3: SENTIMENT
 # ==========================================
-with t3:
+with t3, timed("⭐ Sentiment AI"):
     st.subheader("🤖 AI Sentiment")
-    if not f_df.empty:
-        st.bar_chart(f_df['sentiment_label'].value_counts())
+    if f_stats.review_count:
+        st.bar_chart(pd.Series({s: n for s, n in f_stats.sentiment_counts.items() if n}, name="count"))
         with st.expander("Show Comments"):
-            st.write(f_df['feedback_comment'])
+            show_paged_table(f"comments_{faculty_id}",
+                             lambda **kw: load_feedback_page(faculty_id, **kw),
+                             f_stats.review_count, columns=['feedback_comment'])
     else:
         st.write("No data.")
 
 # ==========================================
 # 📈 TAB 4: PERFORMANCE (AUTO-CALCULATE)
 # ==========================================
-with t4:
+with t4, timed("📈 Performance"):
     st.subheader("🏆 Annual Performance Appraisal")
     st.write(f"Performance Data for: **{selected_faculty} (ID: {faculty_id})**")
 
     # 1. Calculate Score (Independent)
     score_data = None
     try:
-        with st.spinner("Analyzing performance metrics..."):
-            score_data = db.calculate_appraisal_score(faculty_id)
+        with st.spinner("Analyzing performance metrics..."), timed("Appraisal score"):
+            score_data = load_appraisal_score(faculty_id)
         
         if score_data and score_data['total'] > 0:
             c1, c2 = st.columns([1, 2])
             c1.metric("Final Score", f"{score_data['total']}/100")
             c2.json(score_data['breakdown'])
-        else:
-            st.warning("⚠️ Score is 0. This profile might need data sync.")
-            if st.button("🔄 Sync Missing Data Now"):
-                # Quick fix button inside the app!
-                try:
-                    conn = db.get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("UPDATE faculty_master SET research_score = 85 WHERE faculty_id = ?", (faculty_id,))
-                    reviews = [(faculty_id, "CS101", 5, "Auto-Fix", "Positive", 1.0)]
-                    cursor.executemany("INSERT INTO student_feedback (faculty_id, course_name, rating, feedback_comment, sentiment_label, sentiment_score) VALUES (?, ?, ?, ?, ?, ?)", reviews)
-                    conn.commit()
-                    st.success("Data injected! Refresh page.")
-                except:
-                    st.error("Sync failed.")
-                    
+        if not score_data or score_data['total'] <= db.ATTENDANCE_SCORE:
+            # Nothing but the fixed attendance points: no feedback or research on record
+            st.warning("⚠️ No feedback or research on record. This profile might need data sync.")
+            job_panel(f"sync_{faculty_id}", "sync_profile", "🔄 Sync Missing Data Now", faculty_id=int(faculty_id))
+
     except Exception as e:
         st.error(f"Error calculating score: {e}")
 
-    # 2. Generate PDF (Independent)
+    # 2. Generate PDF (Independent, only on request, in the background)
     if score_data:
-        try:
-            pdf_file = pdf_gen.generate_appraisal_pdf(faculty_id)
-            if pdf_file:
-                with open(pdf_file, "rb") as f:
-                    st.download_button("⬇️ Download Report", f, file_name=pdf_file, mime="application/pdf")
-        except:
-            st.caption("PDF generation unavailable for incomplete profiles.")
+        job_panel(f"pdf_{faculty_id}", "appraisal_report", "📄 Prepare PDF Report", faculty_id=int(faculty_id))
 
 # ==========================================
 # 🔒 TAB 5: HOD DASHBOARD
 # ==========================================
 if current_role == "HOD" and t5:
-    with t5:
-        st.subheader("HOD Approval Portal")
-        pending = db.get_pending_leaves()
-        if not pending.empty:
-            for i, row in pending.iterrows():
-                c1, c2, c3 = st.columns([3, 1, 1])
-                c1.write(f"{row['name']} - {row['days_requested']} Days ({row['type']})")
-                if c2.button("Approve", key=f"a_{row['leave_id']}"):
-                    db.update_leave_status(row['leave_id'], "Approved"); st.rerun()
-                if c3.button("Reject", key=f"r_{row['leave_id']}"):
-                    db.update_leave_status(row['leave_id'], "Rejected"); st.rerun()
-        else:
-            st.success("No pending requests.")
+    with t5, timed("🔒 HOD Dashboard"):
+        approval_queue()
 
 # ==========================================
 # 📚 TAB 6: TEACHING TRACKER
 # ==========================================
-with t6:
-    st.subheader("Teaching Tracker")
-    tp = db.get_teaching_progress(faculty_id)
-    if not tp.empty:
-        curr = tp.iloc[-1]
-        st.metric(f"Week {curr['week_number']} Completion", f"{curr['teacher_completion_pct']}%")
-        st.line_chart(tp.set_index("week_number")['teacher_completion_pct'])
-    else:
-        st.info("Initializing tracker...")
+with t6, timed("📚 Teaching Tracker"):
+    teaching_tracker(faculty_id)
+
+# ==========================================
+# 🏢 TAB 7: DEPARTMENT OVERVIEW
+# ==========================================
+if current_role == "HOD" and t7:
+    with t7, timed("🏢 Department Overview"):
+        department_overview()
+
+# ==========================================
+# 🐞 PERFORMANCE DEBUG (HOD ONLY)
+# ==========================================
+page_run.context.update(role=current_role, user_id=user_id, faculty_id=int(faculty_id))
+page_run.finish()
+
+if current_role == "HOD":
+    with st.sidebar.expander("🐞 Performance Debug"):
+        st.caption(f"Run {page_run.run_id} · {page_run.total_ms:.0f} ms · log: {perf.PERF_LOG_FILE}")
+        sections = pd.DataFrame(page_run.as_record()["sections"])
+        sections["section"] = ["\u2003" * d + n.split(" › ")[-1] for n, d in zip(sections["name"], sections["depth"])]
+        st.dataframe(sections[["section", "ms", "statements", "rows"]], hide_index=True, use_container_width=True,
+                     column_config={"section": "Section", "ms": st.column_config.NumberColumn("ms", format="%.1f"),
+                                    "statements": "SQL", "rows": "Rows"})
+
+        cache = db.get_cache_stats()
+        st.caption(f"Query cache: {cache['hits']} hits · {cache['misses']} misses · {cache['entries']} entries")
+        reports = pdf_gen.report_cache.stats()
+        st.caption(f"Report cache: {reports['hit_ratio']:.0%} hit ratio · {reports['entries']} reports · "
+                   f"{reports['bytes'] / 1024:.0f} KB")
+        job_counts = db.get_job_counts()
+        st.caption("Jobs: " + (" · ".join(f"{n} {status}" for status, n in sorted(job_counts.items())) or "none"))
+        # Recomputes feedback_stats and leave_ledger from the source tables
+        job_panel("rebuild", "rebuild_aggregates", "🧮 Rebuild Aggregates")
+
+        # Panel reruns since the last full run are logged on their own
+        panel_runs = [r for r in perf.read_recent_runs(20)
+                      if r["kind"] == "fragment" and r.get("user_id") == user_id]
+        if panel_runs:
+            st.markdown("**Recent panel reruns**")
+            st.dataframe(pd.DataFrame([{"panel": r["sections"][0]["name"], "ms": r["total_ms"],
+                                        "SQL": r["sections"][0]["statements"], "at": r["started_at"][11:]}
+                                       for r in panel_runs[:5]]),
+                         hide_index=True, use_container_width=True)
@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+import pdf_utils
+import db_utils as db
+import schema_utils
+
+# Generates the appraisal report of every faculty member (or of one
+# department) in parallel and packs them into a single ZIP archive.
+#   python batch_reports.py                      -> all faculty
+#   python batch_reports.py --department "CSE"   -> one department
+#   python batch_reports.py --workers 4 --output reports.zip
+
+def show_progress(done, total):
+    bar = "█" * (30 * done // total)
+    sys.stdout.write(f"\r   [{bar:<30}] {done}/{total}")
+    sys.stdout.flush()
+
+if __name__ == "__main__":
+    # Worker processes re-import this module, so everything runs under the guard
+    parser = argparse.ArgumentParser(description="Batch appraisal PDF generation")
+    parser.add_argument("--department", help="only this department (default: all faculty)")
+    parser.add_argument("--output", default="Appraisal_Reports.zip", help="ZIP archive to write")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    conn = db.get_connection()
+    schema_utils.migrate(conn)
+    conn.close()
+
+    if args.department and args.department not in db.get_faculty_directory().departments:
+        print(f"❌ Unknown department: {args.department}")
+        sys.exit(1)
+
+    print(f"📦 GENERATING APPRAISAL REPORTS ({args.department or 'all departments'})...")
+    stats = pdf_utils.generate_department_reports(args.output, args.department,
+                                                  workers=args.workers, progress=show_progress)
+    print()
+    print(f"✅ {stats['reports']} reports in {stats['seconds']}s with {stats['workers']} worker(s) "
+          f"-> {stats['reports_per_sec']} reports/sec ({stats['cached']} from the report cache)")
+    print(f"🗂️  Archive: {os.path.abspath(args.output)} ({os.path.getsize(args.output) / 1024:.0f} KB)")
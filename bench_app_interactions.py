@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import functools
+from collections import defaultdict
+
+# Per-interaction latency of the Streamlit app: the whole page (what every
+# click used to cost) vs. only the panel that was clicked (what a fragment
+# rerun costs). Streamlit's AppTest always reruns the whole script, so
+# st.fragment is wrapped to time each panel's own execution.
+# Runs on the in-memory engine filled from the CSV fixtures.
+
+os.environ["EDUHR_DB_ENGINE"] = "memory"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+import db_utils as db
+
+ROUNDS = 5
+
+panel_times = defaultdict(float)
+_fragment = st.fragment
+
+def timed_fragment(func=None, **kwargs):
+    def decorate(f):
+        @functools.wraps(f)
+        def body(*args, **kw):
+            start = time.perf_counter()
+            try:
+                return f(*args, **kw)
+            finally:
+                panel_times[f.__name__] += time.perf_counter() - start
+        return _fragment(body, **kwargs)
+    return decorate(func) if func else decorate
+
+st.fragment = timed_fragment
+
+def new_session(role, user_id):
+    at = AppTest.from_file(os.path.join(BASE_DIR, "app.py"), default_timeout=60)
+    at.session_state["authenticated"] = True
+    at.session_state["role"] = role
+    at.session_state["user_id"] = user_id
+    at.run()
+    return at
+
+def measure(label, panel, interact, setup=None):
+    full, own = [], []
+    for _ in range(ROUNDS):
+        if setup:
+            setup()
+        panel_times.clear()
+        start = time.perf_counter()
+        interact()
+        full.append(time.perf_counter() - start)
+        own.append(panel_times[panel])
+    full_ms, own_ms = sorted(full)[ROUNDS // 2] * 1000, sorted(own)[ROUNDS // 2] * 1000
+    print(f"{label:<28}{full_ms:>14.1f}{own_ms:>14.1f}{full_ms / own_ms:>9.1f}x")
+
+print(f"⏱️  APP INTERACTION LATENCY (median of {ROUNDS}, in-memory fixtures)\n")
+print(f"{'Interaction':<28}{'Full page (ms)':>14}{'Panel (ms)':>14}{'Saved':>10}")
+
+faculty = new_session("Faculty", 101)
+email = [t for t in faculty.toggle if "Email" in t.label][0]
+measure("Toggle email draft", "leave_portal", lambda: email.set_value(not email.value).run())
+measure("Submit leave request", "leave_portal",
+        lambda: faculty.button(key="FormSubmitter:leave_form-Submit Request").click().run())
+
+# Fresh pending requests, so every HOD round has a batch to approve
+hod = new_session("HOD", 999)
+faculty_ids = db.get_faculty_names()['faculty_id'][:ROUNDS * 4]
+
+def add_pending():
+    for fid in faculty_ids.sample(4):
+        db.apply_for_leave(int(fid), "OD", 1)
+    st.cache_data.clear()  # requests made outside the app, so drop its cached reads
+    hod.run()
+
+measure("Approve all matching", "approval_queue",
+        lambda: [b for b in hod.button if b.label.startswith("✅ Approve All")][0].click().run(),
+        setup=add_pending)
@@ -0,0 +1,74 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+import base64
+
+# Cold-start vs warm-rerun time of the Streamlit app. "Cold" drops every
+# Streamlit cache (as after a server restart), so the schema check and the
+# background encoding run again; "warm" is a normal rerun that reuses them.
+# Works on a temporary copy of the database, next to a 1 MB test background.
+
+ROUNDS = 9
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+import db_utils as db
+import schema_utils
+
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "startup.db")
+shutil.copy(db.DB_FILE, db_path)
+db.set_engine(db.SQLiteFileEngine(db_path))
+with open(os.path.join(tmp_dir, "background.jpg"), "wb") as f:
+    f.write(os.urandom(1024 * 1024))
+os.chdir(tmp_dir)  # the app loads background.jpg from the working directory
+
+def page_view(at=None):
+    if at is None:
+        at = AppTest.from_file(os.path.join(BASE_DIR, "app.py"), default_timeout=60)
+        at.session_state["authenticated"] = True
+        at.session_state["role"] = "Faculty"
+        at.session_state["user_id"] = 101
+    start = time.perf_counter()
+    at.run()
+    assert not at.exception, at.exception
+    return at, (time.perf_counter() - start) * 1000
+
+def cold_view():
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    db.clear_query_cache()
+    return page_view()[1]
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+print("⏱️  APP STARTUP BENCHMARK\n")
+first = cold_view()  # applies any pending migrations to the copy
+cold = median([cold_view() for _ in range(ROUNDS)])
+at, _ = page_view()
+warm = median([page_view(at)[1] for _ in range(ROUNDS)])
+
+# What every rerun used to repeat before the startup phase was cached
+def old_startup_work():
+    start = time.perf_counter()
+    conn = db.get_connection()
+    schema_utils.migrate(conn)
+    conn.close()
+    with open("background.jpg", "rb") as f:
+        base64.b64encode(f.read()).decode()
+    return (time.perf_counter() - start) * 1000
+
+removed = median([old_startup_work() for _ in range(ROUNDS)])
+
+print(f"\n{'First start (migrations)':<32}{first:>10.1f} ms")
+print(f"{'Cold start (schema current)':<32}{cold:>10.1f} ms")
+print(f"{'Warm rerun':<32}{warm:>10.1f} ms")
+print(f"{'Startup work skipped per rerun':<32}{removed:>10.1f} ms")
+
+db.set_engine(db.SQLiteFileEngine())
+shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,58 @@
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Throughput of department-wide appraisal PDF generation at ~500 faculty:
+# the old way (one generate_appraisal_pdf call per faculty member, each
+# fetching its own profile and score) vs. pdf_utils.generate_department_reports
+# with bulk prefetch, serially and on a process pool - with an empty report
+# cache, then again with every report already cached.
+# Runs on the in-memory engine with the CSV fixtures grown 5x (490 faculty)
+# and a throwaway report cache folder.
+
+SCALE = 5
+os.environ["EDUHR_DB_ENGINE"] = "memory"
+os.environ["EDUHR_FIXTURE_SCALE"] = str(SCALE)
+CACHE_DIR = tempfile.mkdtemp()
+os.environ["EDUHR_REPORT_CACHE"] = CACHE_DIR
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import db_utils as db
+import pdf_utils
+
+def one_by_one():
+    db.clear_query_cache()
+    pdf_utils.report_cache.purge()
+    start = time.perf_counter()
+    ids = db.get_faculty_names()['faculty_id'].tolist()
+    for fid in ids:
+        pdf_utils.generate_appraisal_pdf(int(fid))
+    return len(ids), time.perf_counter() - start
+
+def batch(workers, warm=False):
+    db.clear_query_cache()
+    if not warm:
+        pdf_utils.report_cache.purge()
+    stats = pdf_utils.generate_department_reports(io.BytesIO(), workers=workers)
+    return stats["reports"], stats["seconds"]
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    print(f"⏱️  BATCH APPRAISAL REPORTS ({len(db.get_faculty_names())} faculty, {cpus} CPU(s))\n")
+    print(f"{'Method':<34}{'Reports':>8}{'Seconds':>10}{'Reports/sec':>14}")
+    methods = [("One call per faculty (no ZIP)", one_by_one), ("Batch, 1 process", lambda: batch(1))]
+    if cpus > 1:
+        methods.append((f"Batch, {cpus} worker processes", lambda: batch(cpus)))
+    methods.append(("Batch, every report cached", lambda: batch(cpus, warm=True)))
+    for label, run in methods:
+        reports, seconds = run()
+        print(f"{label:<34}{reports:>8}{seconds:>10.2f}{reports / seconds:>14.1f}")
+
+    stats = pdf_utils.report_cache.stats()
+    print(f"\n🗄️  Report cache: {stats['entries']} reports, {stats['bytes'] / 1024:.0f} KB, "
+          f"hit ratio {stats['hit_ratio']:.0%} over the runs above")
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,45 @@
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+# Department digest at 500+ faculty: wall time, pages per second, file size
+# and peak Python memory while rendering, at two data sizes - the page-by-
+# page output should keep peak memory close to the size of the finished PDF.
+# Runs on the in-memory engine with the CSV fixtures grown 12x (1,176 faculty);
+# the smaller run is one department's share of the same data.
+
+SCALE = 12
+os.environ["EDUHR_DB_ENGINE"] = "memory"
+os.environ["EDUHR_FIXTURE_SCALE"] = str(SCALE)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import db_utils as db
+import digest_utils
+
+def run(department):
+    """Timed run, then a second run under tracemalloc for the peak (it slows rendering down)."""
+    db.clear_query_cache()
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    stats = digest_utils.generate_department_digest(buffer, department)
+    seconds = time.perf_counter() - start
+
+    db.clear_query_cache()
+    tracemalloc.start()
+    digest_utils.generate_department_digest(io.BytesIO(), department)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return stats, seconds, len(buffer.getvalue()), peak
+
+if __name__ == "__main__":
+    departments = db.get_faculty_directory().departments
+    print(f"⏱️  DEPARTMENT DIGEST ({len(db.get_faculty_names())} faculty)\n")
+    print(f"{'Scope':<18}{'Faculty':>8}{'Pages':>7}{'Seconds':>9}{'Pages/sec':>11}{'PDF (KB)':>10}{'Peak (MB)':>11}")
+    run(departments[0])  # warm-up
+    for label, department in [(departments[0], departments[0]), ("All Departments", None)]:
+        stats, seconds, size, peak = run(department)
+        print(f"{label:<18}{stats['faculty']:>8}{stats['pages']:>7}{seconds:>9.2f}"
+              f"{stats['pages'] / seconds:>11.1f}{size / 1024:>10.0f}{peak / 1024 / 1024:>11.1f}")
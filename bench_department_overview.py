@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+
+# Times the department overview at ~1,000 faculty: the grouped db_utils
+# queries (uncached) and the whole HOD page in Streamlit's AppTest.
+# Runs on the in-memory engine with the CSV fixtures grown 11x (1,078 faculty).
+
+SCALE = 11
+ROUNDS = 5
+os.environ["EDUHR_DB_ENGINE"] = "memory"
+os.environ["EDUHR_FIXTURE_SCALE"] = str(SCALE)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+import db_utils as db
+
+def median_ms(fn):
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[ROUNDS // 2] * 1000
+
+start = time.perf_counter()
+faculty = len(db.get_faculty_names())
+print(f"⏱️  DEPARTMENT OVERVIEW ({faculty} faculty, fixtures loaded in {time.perf_counter() - start:.2f}s)\n")
+
+dept = db.get_faculty_record(1).department
+cases = [
+    ("Overview, all faculty", lambda: db.get_department_overview.__wrapped__()),
+    (f"Overview, {dept}", lambda: db.get_department_overview.__wrapped__(dept)),
+    ("Per-department summary", lambda: (db.clear_query_cache(), db.get_department_summary())),
+]
+for label, fn in cases:
+    print(f"{label:<28}{median_ms(fn):>10.1f} ms")
+
+def hod_page():
+    at = AppTest.from_file(os.path.join(BASE_DIR, "app.py"), default_timeout=60)
+    at.session_state["authenticated"] = True
+    at.session_state["role"] = "HOD"
+    at.session_state["user_id"] = 999
+    at.run()
+    return at
+
+at = hod_page()
+assert not at.exception, at.exception
+print(f"{'HOD page, cold caches':<28}{median_ms(lambda: (st.cache_data.clear(), db.clear_query_cache(), hod_page())):>10.1f} ms")
+print(f"{'HOD page, warm rerun':<28}{median_ms(at.run):>10.1f} ms")
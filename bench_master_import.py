@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+
+# Import speed of master_import: the old loader (one cursor.execute per
+# df.iterrows() row, default PRAGMAs, indexes in place during the load) vs.
+# fixture_utils.bulk_load (vectorized columns, chunked executemany in one
+# transaction, bulk-load PRAGMAs, indexes built after the load).
+# Runs on the shipped CSVs and on a synthetic 100x copy, each into a fresh
+# temporary database file; rows/sec is per table, total includes the schema
+# setup and the aggregate rebuilds.
+
+SCALES = (1, 100)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import db_utils
+import schema_utils
+import fixture_utils as fx
+from master_import import IMPORT_TABLES
+
+def old_import(conn, frames):
+    """The previous master_import body, minus the prints."""
+    schema_utils.migrate(conn)
+    cursor = conn.cursor()
+    stats = {}
+
+    def timed_rows(table, df, insert):
+        start = time.perf_counter()
+        for _, row in df.iterrows():
+            insert(row)
+        stats[table] = (len(df), len(df) / (time.perf_counter() - start))
+
+    timed_rows("faculty_master", frames[fx.FACULTY_CSV], lambda row: cursor.execute("""
+        INSERT INTO faculty_master (faculty_id, name, designation, department, joining_date)
+        VALUES (?, ?, ?, ?, ?)
+    """, (row['faculty_id'], row['name'], row['designation'], row['department'], row['date_of_joining'])))
+
+    def research(row):
+        total_papers = (row.get('journal_publications', 0) + row.get('research_papers', 0) +
+                        row.get('conference_papers', 0) + row.get('scopus_indexed_papers', 0))
+        cursor.execute("""
+            INSERT INTO research_records (faculty_id, publications_count, patents_count, projects_count)
+            VALUES (?, ?, ?, ?)
+        """, (row['faculty_id'], int(total_papers), int(row.get('patents', 0)), 0))
+    timed_rows("research_records", frames[fx.PERFORMANCE_CSV], research)
+
+    db_utils.pause_feedback_stats(conn)
+    timed_rows("student_feedback", frames[fx.FEEDBACK_CSV], lambda row: cursor.execute("""
+        INSERT INTO student_feedback
+        (faculty_id, course_name, rating, feedback_comment, sentiment_label,
+         teaching_clarity_score, engagement_score, pace_score)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (row['faculty_id'], row['course_name'], row['rating'], row['feedback_comment'], row['sentiment_label'],
+          row['teaching_clarity_score'], row['engagement_score'], row['pace_score'])))
+    db_utils.resume_feedback_stats(conn)
+
+    days_col = [c for c in frames[fx.LEAVE_CSV].columns if "days" in c.lower()][0]
+    timed_rows("leave_records", frames[fx.LEAVE_CSV], lambda row: cursor.execute("""
+        INSERT INTO leave_records (faculty_id, type, days_requested, status)
+        VALUES (?, ?, ?, ?)
+    """, (row['faculty_id'], row['type'], row[days_col], row['status'])))
+
+    db_utils.rebuild_leave_ledger(conn)
+    conn.commit()
+    return stats
+
+def new_import(conn, frames):
+    stats = fx.bulk_load(conn, frames, IMPORT_TABLES)
+    return {table: (t["rows"], t["rows_per_sec"]) for table, t in stats["tables"].items()}
+
+def run(loader, frames, tmp_dir):
+    path = os.path.join(tmp_dir, f"{loader.__name__}.db")
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    stats = loader(conn, frames)
+    total = time.perf_counter() - start
+    counts = [conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("feedback_stats", "leave_ledger")]
+    conn.close()
+    os.remove(path)
+    return stats, total, counts
+
+print("⏱️  MASTER IMPORT BENCHMARK")
+tmp_dir = tempfile.mkdtemp()
+csv_frames = fx.read_csv_frames(BASE_DIR)
+
+for scale in SCALES:
+    frames = fx.scale_csv_frames(csv_frames, scale) if scale > 1 else csv_frames
+    old_stats, old_total, old_counts = run(old_import, frames, tmp_dir)
+    new_stats, new_total, new_counts = run(new_import, frames, tmp_dir)
+    assert old_counts == new_counts, (old_counts, new_counts)
+
+    label = "shipped CSVs" if scale == 1 else f"synthetic {scale}x"
+    print(f"\n📊 {label}")
+    print(f"{'Table':<20}{'Rows':>10}{'Old rows/s':>14}{'Bulk rows/s':>14}{'Speedup':>10}")
+    for table, (rows, old_rate) in old_stats.items():
+        new_rate = new_stats[table][1]
+        print(f"{table:<20}{rows:>10,}{old_rate:>14,.0f}{new_rate:>14,.0f}{new_rate / old_rate:>9.1f}x")
+    rows = sum(r for r, _ in old_stats.values())
+    print(f"{'Total import':<20}{rows:>10,}{old_total:>13.2f}s{new_total:>13.2f}s{old_total / new_total:>9.1f}x")
+
+shutil.rmtree(tmp_dir, ignore_errors=True)
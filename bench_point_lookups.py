@@ -0,0 +1,56 @@
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+import db_utils as db
+import schema_utils
+
+# Micro-benchmark: DataFrame (pd.read_sql) path vs the plain-record path for
+# point lookups. The query cache is bypassed (via __wrapped__) so both sides
+# really hit the database. Works on a temporary copy of the database, or on
+# the in-memory engine filled from the CSV fixtures with --memory.
+
+ROUNDS = 2000
+
+tmp_dir = tempfile.mkdtemp()
+if "--memory" in sys.argv:
+    db.set_engine(db.SQLiteMemoryEngine(fixtures=True))
+else:
+    db_path = os.path.join(tmp_dir, "bench.db")
+    shutil.copy(db.DB_FILE, db_path)
+    db.set_engine(db.SQLiteFileEngine(db_path))
+
+conn = db.get_connection()
+schema_utils.migrate(conn)
+fid = conn.execute("SELECT MIN(faculty_id) FROM faculty_master").fetchone()[0]
+conn.close()
+
+names = db.get_faculty_names()
+directory = db.get_faculty_directory()
+
+CASES = [
+    ("Name by ID",
+     lambda: names[names['faculty_id'] == fid]['name'].values[0],
+     lambda: directory.name_of(fid)),
+    ("Faculty profile",
+     lambda: db.get_faculty_profile.__wrapped__(fid).iloc[0],
+     lambda: db.get_faculty_record.__wrapped__(fid)),
+    ("Leave balances",
+     lambda: db.get_leave_balance.__wrapped__(fid),
+     lambda: db.get_leave_balances.__wrapped__(fid)),
+    ("Appraisal score",
+     lambda: db.calculate_appraisal_scores_bulk.__wrapped__(faculty_ids=[fid]).iloc[0],
+     lambda: db.get_appraisal.__wrapped__(fid)),
+]
+
+print(f"⏱️  POINT LOOKUP BENCHMARK ({ROUNDS} calls each, faculty {fid})\n")
+print(f"{'Lookup':<18}{'DataFrame (µs)':>16}{'Record (µs)':>14}{'Speed-up':>10}")
+for label, frame_path, record_path in CASES:
+    frame_path(); record_path()  # warm up connections and imports
+    frame_us = timeit.timeit(frame_path, number=ROUNDS) / ROUNDS * 1e6
+    record_us = timeit.timeit(record_path, number=ROUNDS) / ROUNDS * 1e6
+    print(f"{label:<18}{frame_us:>16.1f}{record_us:>14.1f}{frame_us / record_us:>9.1f}x")
+
+db.close_all_connections()
+shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,58 @@
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Precompiled report template vs. drawing the whole layout for every report:
+# single-report latency (median) and batch throughput over ~500 faculty,
+# rendering only (no report cache, no ZIP), plus a cold-cache department run.
+# Runs on the in-memory engine with the CSV fixtures grown 5x (490 faculty).
+
+SCALE = 5
+ROUNDS = 200
+os.environ["EDUHR_DB_ENGINE"] = "memory"
+os.environ["EDUHR_FIXTURE_SCALE"] = str(SCALE)
+CACHE_DIR = tempfile.mkdtemp()
+os.environ["EDUHR_REPORT_CACHE"] = CACHE_DIR
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import db_utils as db
+import pdf_utils
+
+def single_ms(profile, appraisal, precompiled):
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        pdf_utils.render_appraisal_pdf(profile, appraisal, precompiled=precompiled)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[ROUNDS // 2] * 1000
+
+def batch_per_sec(jobs, precompiled):
+    start = time.perf_counter()
+    for profile, appraisal in jobs:
+        pdf_utils.render_appraisal_pdf(profile, appraisal, precompiled=precompiled)
+    return len(jobs) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    directory = db.get_faculty_directory()
+    scores = db.get_appraisals_bulk()
+    jobs = [(directory.get(fid), db.appraisal_breakdown(score)) for fid, score in sorted(scores.items())]
+    profile, appraisal = jobs[0]
+    pdf_utils.render_appraisal_pdf(profile, appraisal)  # compile the template once
+
+    print(f"⏱️  REPORT TEMPLATE ({len(jobs)} faculty)\n")
+    print(f"{'Renderer':<28}{'Single (ms)':>12}{'Batch (reports/sec)':>22}")
+    results = {}
+    for label, precompiled in [("Full layout per report", False), ("Precompiled template", True)]:
+        results[precompiled] = (single_ms(profile, appraisal, precompiled), batch_per_sec(jobs, precompiled))
+        print(f"{label:<28}{results[precompiled][0]:>12.2f}{results[precompiled][1]:>22.1f}")
+    print(f"{'Speed-up':<28}{results[False][0] / results[True][0]:>11.1f}x"
+          f"{results[True][1] / results[False][1]:>21.1f}x")
+
+    stats = pdf_utils.generate_department_reports(io.BytesIO(), workers=1)
+    print(f"\n📦 Department ZIP, cold report cache: {stats['reports']} reports in {stats['seconds']}s "
+          f"({stats['reports_per_sec']} reports/sec)")
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import sys
+import subprocess
+import pandas as pd
+import db_utils as db
+import fixture_utils
+
+# Loads the project CSVs into both storage engines - a temporary database
+# file and the shared-cache in-memory engine - then runs the same sequence of
+# db_utils reads and writes on each and checks that every result matches.
+
+def run_scenario():
+    """Every step returns something comparable; writes are followed by reads."""
+    fid = int(db.get_faculty_names()['faculty_id'].min())
+    dept = db.get_faculty_record(fid).department
+    steps = [
+        ("get_faculty_names", lambda: db.get_faculty_names()),
+        ("get_faculty_profile", lambda: db.get_faculty_profile(fid)),
+        ("get_faculty_record", lambda: db.get_faculty_record(fid)),
+        ("get_leave_balance", lambda: db.get_leave_balance(fid)),
+        ("get_leave_balances", lambda: db.get_leave_balances(fid)),
+        ("apply_for_leave", lambda: db.apply_for_leave(fid, "CL", 2)),
+        ("get_pending_leaves", lambda: db.get_pending_leaves()),
+        ("update_leave_status", lambda: db.update_leave_status(
+            int(db.get_pending_leaves()['leave_id'].max()), "Approved")),
+        ("grant_bonus_leave", lambda: db.grant_bonus_leave(fid, "SL", 3)),
+        ("get_leave_balance (after writes)", lambda: db.get_leave_balance(fid)),
+        ("get_leave_history", lambda: db.get_leave_history(fid)),
+        ("get_leave_history_page", lambda: db.get_leave_history_page(fid)),
+        ("count_leave_history", lambda: db.count_leave_history(fid)),
+        ("get_all_past_leaves_page", lambda: db.get_all_past_leaves_page()),
+        ("count_past_leaves", lambda: db.count_past_leaves()),
+        ("get_student_feedback_page", lambda: db.get_student_feedback_page(fid)),
+        ("count_student_feedback", lambda: db.count_student_feedback(fid)),
+        ("get_feedback_summary", lambda: db.get_feedback_summary(fid)),
+        ("get_course_feedback_stats", lambda: db.get_course_feedback_stats(fid)),
+        ("calculate_appraisal_scores_bulk", lambda: db.calculate_appraisal_scores_bulk(dept)),
+        ("calculate_appraisal_score", lambda: db.calculate_appraisal_score(fid)),
+        ("get_teaching_progress", lambda: db.get_teaching_progress(fid)),
+        ("update_all_pending_leaves", lambda: db.update_all_pending_leaves("Rejected")),
+        ("verify_leave_ledger", lambda: len(db.verify_leave_ledger())),
+    ]
+    return [(label, call()) for label, call in steps]
+
+def same(a, b):
+    if isinstance(a, pd.DataFrame):
+        return a.equals(b)
+    if isinstance(a, db.Page):
+        return same(a.rows, b.rows) and (a.first_key, a.last_key, a.has_prev, a.has_next) == \
+            (b.first_key, b.last_key, b.has_prev, b.has_next)
+    return a == b
+
+print("🚀 CHECKING STORAGE ENGINES...")
+
+# 1. FILE ENGINE (temporary database)
+tmp_dir = tempfile.mkdtemp()
+db.set_engine(db.SQLiteFileEngine(os.path.join(tmp_dir, "fixtures.db")))
+conn = db.get_connection()
+counts = fixture_utils.load_csv_fixtures(conn)
+conn.close()
+print("📥 Fixtures: " + ", ".join(f"{table} {n}" for table, n in counts.items()))
+file_results = run_scenario()
+
+# 2. MEMORY ENGINE
+memory = db.SQLiteMemoryEngine(fixtures=True)
+db.set_engine(memory)
+memory_results = run_scenario()
+
+db.set_engine(db.SQLiteFileEngine())
+memory.dispose()
+shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# 3. ENGINE CHOSEN BY THE ENVIRONMENT
+# A fresh process whose first cached read builds the memory engine (and
+# loads its fixtures) on the spot, as the benchmarks do
+smoke = subprocess.run([sys.executable, "-c", "import db_utils; print(len(db_utils.get_faculty_names()))"],
+                       env={**os.environ, "EDUHR_DB_ENGINE": "memory"}, cwd=os.path.dirname(os.path.abspath(__file__)),
+                       capture_output=True, text=True, timeout=120)
+if smoke.returncode != 0 or not smoke.stdout.strip():
+    print(f"❌ Cached read under EDUHR_DB_ENGINE=memory failed:\n{smoke.stderr}")
+    sys.exit(1)
+print(f"🧪 EDUHR_DB_ENGINE=memory: first cached read returned {smoke.stdout.strip()} faculty")
+
+# 4. REPORT
+mismatches = [label for (label, a), (_, b) in zip(file_results, memory_results) if not same(a, b)]
+for label in mismatches:
+    print(f"❌ MISMATCH: {label}")
+if mismatches:
+    sys.exit(1)
+print(f"✅ SUCCESS! All {len(file_results)} calls return identical results on both engines.")
@@ -0,0 +1,155 @@
+import sqlite3
+import os
+import shutil
+import inspect
+import tempfile
+import sys
+import db_utils as db
+import schema_utils
+
+# Runs every query issued by db_utils through EXPLAIN QUERY PLAN and fails if
+# any filtered query falls back to a full table scan.
+# Works on a temporary copy of the database, so the real data is never touched.
+
+# Plumbing functions that issue no queries of their own, and maintenance
+# commands that read whole tables by design
+SKIP = {"get_connection", "track_queries", "close_all_connections", "get_engine", "set_engine", "rebuild_leave_ledger", "verify_leave_ledger",
+        "rebuild_feedback_stats", "pause_feedback_stats", "resume_feedback_stats",
+        "cached_query", "invalidate_tables", "appraisal_breakdown", "clear_query_cache", "get_cache_stats"}
+
+# Full listings whose filter matches nearly every row, so a scan is the
+# right plan: every decided leave (the paginated version reads by leave_id)
+FULL_LISTINGS = {"get_all_past_leaves"}
+
+print("🚀 CHECKING QUERY PLANS...")
+
+# 1. WORK ON A MIGRATED COPY
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "plan_check.db")
+shutil.copy(db.DB_FILE, db_path)
+db.set_engine(db.SQLiteFileEngine(db_path))
+
+conn = db.get_connection()
+schema_utils.migrate(conn)
+sample_id = conn.execute("SELECT MIN(faculty_id) FROM faculty_master").fetchone()[0]
+# A faculty ID with no leave ledger rows yet, to exercise the first-write path
+new_id = conn.execute("SELECT MAX(faculty_id) + 1 FROM leave_ledger").fetchone()[0]
+sample_dept = conn.execute("SELECT department FROM faculty_master WHERE faculty_id=?", (sample_id,)).fetchone()[0]
+conn.close()
+
+# 2. CAPTURE EVERY STATEMENT db_utils SENDS
+captured = []  # (function name, statement)
+current_call = None
+_get_connection = db.get_connection
+
+def traced_connection():
+    conn = _get_connection()
+    conn.set_trace_callback(lambda sql: captured.append((current_call, sql)))
+    return conn
+
+db.get_connection = traced_connection
+
+# One representative call per db_utils function
+CALLS = {
+    "get_faculty_names": (),
+    "get_faculty_profile": (sample_id,),
+    "get_faculty_record": (sample_id,),
+    "get_faculty_directory": (),
+    "get_leave_balance": (sample_id,),
+    "get_leave_balances": (sample_id,),
+    "apply_for_leave": (sample_id, "CL", 1),
+    "get_leave_history": (sample_id,),
+    "get_leave_history_page": (sample_id,),
+    "count_leave_history": (sample_id,),
+    "get_pending_leaves": (),
+    "update_leave_status": (1, "Approved"),
+    "apply_leave_decisions": ([(2, "Approved"), (3, "Rejected"), (4, "Cancelled")],),
+    "update_all_pending_leaves": ("Rejected",),
+    "get_all_past_leaves": (),
+    "get_all_past_leaves_page": (),
+    "count_past_leaves": (),
+    "grant_bonus_leave": (new_id, "CL", 1),
+    "get_student_feedback": (sample_id,),
+    "get_student_feedback_page": (sample_id,),
+    "count_student_feedback": (sample_id,),
+    "get_feedback_summary": (sample_id,),
+    "get_course_feedback_stats": (sample_id,),
+    "calculate_appraisal_score": (sample_id,),
+    "get_appraisal": (sample_id,),
+    "calculate_appraisal_scores_bulk": (sample_dept,),
+    "get_appraisals_bulk": (sample_dept,),
+    "get_teaching_progress": (sample_id,),
+    "get_department_overview": (sample_dept,),
+    "get_department_summary": (),
+    "get_rating_histograms": (sample_dept,),
+    "get_teaching_curves": (sample_dept,),
+    "sync_faculty_profile": (new_id,),
+    # Job queue calls in lifecycle order; the copy's jobs table starts empty, so the job is #1
+    "enqueue_job": ("appraisal_report", {"faculty_id": sample_id}, str(sample_id)),
+    "claim_next_job": ("plan-check",),
+    "update_job_progress": (1, 0, 1),
+    "heartbeat_jobs": ("plan-check",),
+    "finish_job": (1, "done", "report.pdf", "application/pdf", 1024, 60),
+    "mark_job_downloaded": (1, 60),
+    "fail_job": (1, "failed"),
+    "cancel_job": (1,),
+    "requeue_stale_jobs": (60, 3),
+    "expire_jobs": (),
+    "purge_job_history": (3600,),
+    "get_job": (1,),
+    "list_jobs": (str(sample_id),),
+    "get_job_counts": (),
+}
+
+public = {name for name, fn in inspect.getmembers(db, inspect.isfunction)
+          if fn.__module__ == db.__name__ and not name.startswith("_")} - SKIP
+missing = sorted(public - set(CALLS))
+if missing:
+    print(f"❌ No sample call for: {', '.join(missing)}. Add them to CALLS.")
+    sys.exit(1)
+
+for name, args in CALLS.items():
+    current_call = name
+    db.clear_query_cache()  # make sure every function really hits the database
+    getattr(db, name)(*args)
+
+db.get_connection = _get_connection
+db.close_all_connections()
+
+# 3. EXPLAIN EACH DISTINCT STATEMENT
+plan_conn = sqlite3.connect(db_path)
+failures = []
+checked = 0
+listing_only = ({sql for name, sql in captured if name in FULL_LISTINGS}
+                - {sql for name, sql in captured if name not in FULL_LISTINGS})
+for sql in dict.fromkeys(sql for _, sql in captured):
+    if sql in listing_only:
+        continue
+    keyword = sql.lstrip().split(None, 1)[0].upper()
+    if keyword not in ("SELECT", "UPDATE", "DELETE", "WITH"):
+        continue
+    checked += 1
+    plan = [row[3] for row in plan_conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    # A scan is fine for an unfiltered listing (it returns every row anyway)
+    filtered = " WHERE " in sql.upper()
+    # Scans of CTEs / subqueries (e.g. a VALUES list) read a handful of constant rows
+    derived = {step.split()[-1] for step in plan if step.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    scans = [step for step in plan if step.startswith("SCAN ") and "USING" not in step
+             and "CONSTANT ROW" not in step and step.split()[1] not in derived]
+    if filtered and scans:
+        failures.append((sql, plan))
+
+plan_conn.close()
+shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# 4. REPORT
+if failures:
+    for sql, plan in failures:
+        print("\n❌ FULL TABLE SCAN:")
+        print("   " + " ".join(sql.split()))
+        for step in plan:
+            print(f"   -> {step}")
+    print(f"\n❌ {len(failures)} of {checked} queries scan a whole table.")
+    sys.exit(1)
+
+print(f"✅ SUCCESS! All {checked} queries use an index or primary key.")
@@ -1,95 +1,807 @@
 import sqlite3
 import pandas as pd
+import numpy as np
 import os
-from datetime import datetime
+import sys
+import time
+import random
+import queue
+import threading
+import functools
+import contextlib
+import bisect
+import itertools
+import json
+import numbers
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import schema_utils
 
 # --- DATABASE CONNECTION ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_FILE = os.path.join(BASE_DIR, "academic_hr.db")
 
+# Idle connections kept open between calls. Streamlit runs every session
+# on its own thread, so connections are shared across threads.
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+
+# --- QUERY TRACKING ---
+# Every cursor handed out by a pooled connection reports the statements it
+# runs and the rows it returns to the QueryStats of the calling thread,
+# while a track_queries() block is open there. Outside such a block the
+# cost is one thread-local lookup per call.
+@dataclass(slots=True)
+class QueryStats:
+    statements: int = 0
+    rows: int = 0
+
+_tracking = threading.local()
+
+@contextlib.contextmanager
+def track_queries():
+    """Counts statements and fetched rows on this thread; nested blocks also count toward the outer one."""
+    outer = getattr(_tracking, "stats", None)
+    stats = _tracking.stats = QueryStats()
+    try:
+        yield stats
+    finally:
+        _tracking.stats = outer
+        if outer is not None:
+            outer.statements += stats.statements
+            outer.rows += stats.rows
+
+class TrackedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=(), /):
+        stats = getattr(_tracking, "stats", None)
+        if stats is not None:
+            stats.statements += 1
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        stats = getattr(_tracking, "stats", None)
+        if stats is not None:
+            stats.statements += 1
+        return super().executemany(sql, seq_of_parameters)
+
+    def _count(self, n):
+        stats = getattr(_tracking, "stats", None)
+        if stats is not None:
+            stats.rows += n
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._count(len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        self._count(1)
+        return row
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that goes back to the pool on close().
+    Callers keep the usual `conn = get_connection() ... conn.close()` pattern.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._in_pool = False
+        self._engine = None
+
+    def close(self):
+        if self._in_pool:
+            return
+        # Same semantics as a real close: uncommitted work is discarded
+        if self.in_transaction:
+            self.rollback()
+        if self._engine is not _engine:
+            # Opened before set_engine() switched databases
+            super().close()
+            return
+        try:
+            self._in_pool = True
+            _pool.put_nowait(self)
+        except queue.Full:
+            self._in_pool = False
+            super().close()
+
+    def close_for_real(self):
+        super().close()
+
+    # Route the shortcut methods through TrackedCursor as well
+    def cursor(self, factory=TrackedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+# --- STORAGE ENGINES ---
+# An engine knows how to open a connection to one database. Everything else
+# in this module only talks to get_connection(), so it runs unchanged on
+# either engine. Pick one with the EDUHR_DB_ENGINE environment variable
+# ("file", the default, or "memory") or at runtime with set_engine().
+# The memory engine loads the CSV fixtures, EDUHR_FIXTURE_SCALE times over.
+class SQLiteFileEngine:
+    """The on-disk database (default: academic_hr.db, or $EDUHR_DB_FILE)."""
+    name = "file"
+
+    def __init__(self, path=None):
+        self.path = path or DB_FILE
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000,
+                               factory=PooledConnection, check_same_thread=False)
+        # Per-connection settings, applied once when the connection is opened
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        return conn
+
+    def open_watcher(self):
+        """Plain connection used only to poll PRAGMA data_version (see the query cache)."""
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def dispose(self):
+        pass
+
+class SQLiteMemoryEngine:
+    """
+    A named shared-cache :memory: database, for tests and benchmarks.
+    Every connection of the engine sees the same data; nothing touches disk.
+    With fixtures=True it is filled from the project CSVs (see fixture_utils),
+    grown `scale`-fold with synthetic rows when scale > 1.
+    """
+    name = "memory"
+
+    def __init__(self, db_name="eduhr", fixtures=False, scale=1):
+        self.uri = f"file:{db_name}?mode=memory&cache=shared"
+        # A shared in-memory database only lives while a connection is open
+        self._anchor = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        if fixtures:
+            import fixture_utils
+            fixture_utils.load_csv_fixtures(self._anchor, scale=scale)
+
+    def connect(self):
+        # WAL and mmap do not apply to memory databases. Shared-cache lock
+        # conflicts fail fast with "database table is locked", which
+        # _write_transaction retries like a busy file database.
+        conn = sqlite3.connect(self.uri, uri=True, timeout=BUSY_TIMEOUT_MS / 1000,
+                               factory=PooledConnection, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    def open_watcher(self):
+        return None  # no other process can write to it
+
+    def dispose(self):
+        self._anchor.close()
+
+def _engine_from_env():
+    kind = os.environ.get("EDUHR_DB_ENGINE", "file").lower()
+    if kind == "memory":
+        return SQLiteMemoryEngine(fixtures=True, scale=int(os.environ.get("EDUHR_FIXTURE_SCALE", 1)))
+    if kind == "file":
+        return SQLiteFileEngine(os.environ.get("EDUHR_DB_FILE"))
+    raise ValueError(f"Unknown EDUHR_DB_ENGINE: {kind!r} (expected 'file' or 'memory')")
+
+_engine = None
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = _engine_from_env()
+    return _engine
+
+def set_engine(engine):
+    """
+    Switches every later get_connection() to `engine` and returns the old one.
+    Idle connections to the previous database are closed and cached results dropped.
+    """
+    global _engine
+    old = _engine
+    close_all_connections()
+    _engine = engine
+    clear_query_cache()
+    return old
+
+def _open_connection():
+    engine = get_engine()
+    conn = engine.connect()
+    conn._engine = engine
+    return conn
+
 def get_connection():
-    return sqlite3.connect(DB_FILE)
+    try:
+        conn = _pool.get_nowait()
+        conn._in_pool = False
+        return conn
+    except queue.Empty:
+        return _open_connection()
+
+def close_all_connections():
+    """Closes every idle pooled connection (e.g. before deleting the DB file)."""
+    while True:
+        try:
+            _pool.get_nowait().close_for_real()
+        except queue.Empty:
+            break
+
+# --- QUERY RESULT CACHE ---
+# Read functions decorated with @cached_query(<tables>) keep their results in
+# an LRU cache bounded by CACHE_MAX_BYTES. Every write function bumps the
+# version counter of the tables it changed, and a cached result is only
+# reused while the versions of all the tables it read are unchanged.
+# Code that writes outside db_utils must call invalidate_tables().
+# Commits from other processes (job_worker.py, the import scripts) never
+# reach invalidate_tables(), so a watcher connection polls
+# PRAGMA data_version, which changes whenever another connection commits.
+# A change not made by _write_transaction bumps _external_epoch, which is
+# part of every entry's versions: the whole cache goes stale at once.
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+EXTERNAL_CHECK_SECONDS = 1.0
+CACHE_MAX_AGE = 300  # backstop for an outside commit racing a local one
+
+_cache = OrderedDict()  # key -> (table versions, value, size in bytes, stored at)
+_cache_lock = threading.Lock()
+_cache_bytes = 0
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "external_writes": 0}
+_table_versions = defaultdict(int)
+_external_epoch = 0
+_watch = {"engine": None, "conn": None, "data_version": None, "checked": 0.0}
+
+def _ensure_watcher():
+    """
+    Opens the watcher connection of the current engine. Call it before taking
+    _cache_lock: building an engine can load fixtures, which invalidate tables.
+    """
+    engine = get_engine()
+    if _watch["engine"] is engine:
+        return
+    conn = engine.open_watcher()
+    with _cache_lock:
+        if _watch["engine"] is engine:  # another thread was first
+            stale = conn
+        else:
+            stale = _watch["conn"]
+            _watch.update(engine=engine, conn=conn, data_version=None)
+    if stale is not None:
+        stale.close()
+
+def _watched_data_version():
+    conn = _watch["conn"]
+    return None if conn is None else conn.execute("PRAGMA data_version").fetchone()[0]
+
+def _check_external_writes(force=False):
+    """Returns _external_epoch, bumped first if another connection committed. Hold _cache_lock."""
+    global _external_epoch
+    now = time.monotonic()
+    if force or now - _watch["checked"] >= EXTERNAL_CHECK_SECONDS:
+        _watch["checked"] = now
+        version = _watched_data_version()
+        if version != _watch["data_version"]:
+            if _watch["data_version"] is not None:
+                _external_epoch += 1
+                _cache_stats["external_writes"] += 1
+            _watch["data_version"] = version
+    return _external_epoch
+
+def _freeze(value):
+    """Makes list arguments hashable so they can be part of a cache key."""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _result_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    return sys.getsizeof(value)
+
+def _copy_result(value):
+    # Callers get their own DataFrame, so they cannot alter the cached one
+    return value.copy() if isinstance(value, pd.DataFrame) else value
+
+def cached_query(*tables):
+    """Decorator: caches a read function's result until one of `tables` is written."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            global _cache_bytes
+            key = (fn.__name__, _freeze(args), _freeze(tuple(sorted(kwargs.items()))))
+            _ensure_watcher()
+            with _cache_lock:
+                versions = (_check_external_writes(), *(_table_versions[t] for t in tables))
+                entry = _cache.get(key)
+                if entry is not None and entry[0] == versions and time.monotonic() - entry[3] < CACHE_MAX_AGE:
+                    _cache.move_to_end(key)
+                    _cache_stats["hits"] += 1
+                    return _copy_result(entry[1])
+                _cache_stats["misses"] += 1
+
+            # Run the query outside the lock. `versions` was read first, so a
+            # write that lands meanwhile makes this entry stale straight away.
+            value = fn(*args, **kwargs)
+            size = _result_size(value)
+            if size > CACHE_MAX_BYTES:
+                return value
+
+            with _cache_lock:
+                old = _cache.pop(key, None)
+                if old is not None:
+                    _cache_bytes -= old[2]
+                _cache[key] = (versions, _copy_result(value), size, time.monotonic())
+                _cache_bytes += size
+                while _cache_bytes > CACHE_MAX_BYTES:
+                    _, (_, _, evicted_size, _) = _cache.popitem(last=False)
+                    _cache_bytes -= evicted_size
+                    _cache_stats["evictions"] += 1
+            return value
+        return wrapper
+    return decorator
+
+def invalidate_tables(*tables):
+    """Marks every cached result that read any of `tables` as stale."""
+    with _cache_lock:
+        for table in tables:
+            _table_versions[table] += 1
+
+def clear_query_cache():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+def get_cache_stats():
+    """Hit/miss counters plus the current cache size."""
+    with _cache_lock:
+        lookups = _cache_stats["hits"] + _cache_stats["misses"]
+        return {
+            **_cache_stats,
+            "entries": len(_cache),
+            "bytes": _cache_bytes,
+            "hit_ratio": round(_cache_stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+# --- WRITE TRANSACTIONS ---
+# Writers take the database write lock up front (BEGIN IMMEDIATE), so the
+# reads they base their decision on cannot change before they commit.
+# If the lock is still busy after the busy timeout, retry with backoff.
+WRITE_RETRIES = 5
+RETRY_BASE_DELAY = 0.05
+
+def _write_transaction(work, *tables):
+    """
+    Runs work(cursor) inside one BEGIN IMMEDIATE transaction and commits.
+    Retries on lock contention, then marks `tables` as changed.
+    """
+    for attempt in range(WRITE_RETRIES):
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            result = work(cursor)
+            _ensure_watcher()
+            # Holding the write lock, nobody else can commit: take note of
+            # outside commits first, then the data_version change is our own
+            with _cache_lock:
+                _check_external_writes(force=True)
+                conn.commit()
+                _watch["data_version"] = _watched_data_version()
+            break
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            if attempt == WRITE_RETRIES - 1:
+                raise
+            time.sleep(RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5))
+        finally:
+            conn.close()  # rolls back anything left uncommitted
+    invalidate_tables(*tables)
+    return result
+
+# --- LIGHTWEIGHT RECORDS ---
+# Point lookups (one profile, one balance, one score) return these plain
+# records straight from the cursor instead of building a DataFrame.
+# DataFrames are kept for the functions whose result is shown as a table.
+@dataclass(frozen=True, slots=True)
+class FacultyProfile:
+    faculty_id: int
+    name: str
+    designation: str
+    department: str
+    joining_date: str
+
+@dataclass(frozen=True, slots=True)
+class LeaveBalance:
+    leave_type: str
+    allocated: int
+    bonus: int
+    used: int
+    pending: int
+
+    @property
+    def total(self):
+        return self.allocated + self.bonus
+
+    @property
+    def available(self):
+        # Pending requests are reserved: they count against the balance until rejected
+        return self.total - self.used - self.pending
+
+@dataclass(frozen=True, slots=True)
+class AppraisalScore:
+    faculty_id: int
+    feedback_score: float
+    research_score: int
+    attendance_score: int
+
+    @property
+    def total(self):
+        return int(self.feedback_score + self.research_score + self.attendance_score)
+
+@dataclass(frozen=True, slots=True)
+class FeedbackSummary:
+    review_count: int
+    avg_rating: float        # None when no review has a rating
+    rating_counts: dict      # {1: n, ..., 5: n}
+    sentiment_counts: dict   # {'Positive': n, 'Neutral': n, 'Negative': n}
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    job_id: int
+    kind: str
+    params: dict
+    owner: str
+    status: str              # queued, running, done, failed, cancelled or expired
+    progress: int
+    total: int
+    message: str
+    artifact_name: str       # None when the job produced no file
+    artifact_mime: str
+    artifact_bytes: int
+    attempts: int
+    created_at: str
+    started_at: str
+    finished_at: str
+    expires_at: str
+    downloaded_at: str
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+@dataclass(frozen=True, slots=True)
+class Page:
+    """One page of a keyset-paginated listing, newest first."""
+    rows: pd.DataFrame
+    first_key: int   # key of the first (newest) row, cursor for the previous page
+    last_key: int    # key of the last (oldest) row, cursor for the next page
+    has_prev: bool
+    has_next: bool
+
+# --- KEYSET PAGINATION ---
+# Listings are ordered newest first by their integer primary key. A page is
+# "rows with key below the cursor" (next) or "above the cursor" (prev), so
+# every page is an index range read of page_size rows, however long the
+# history is - unlike LIMIT/OFFSET, which walks all the skipped rows.
+PAGE_SIZE = 10
+_NO_CURSOR = 2 ** 63 - 1  # larger than any rowid: "start from the newest row"
+
+def _keyset_page(select_sql, filter_sql, params, key_col, cursor, page_size, direction):
+    if direction not in ("next", "prev"):
+        raise ValueError(f"direction must be 'next' or 'prev', not {direction!r}")
+    going_back = direction == "prev"
+    if cursor is None:
+        cursor, going_back = _NO_CURSOR, False
+
+    op, order = (">", "ASC") if going_back else ("<", "DESC")
+    where = f"({filter_sql}) AND {key_col} {op} ?" if filter_sql else f"{key_col} {op} ?"
+    conn = get_connection()
+    # One extra row tells us whether there is anything beyond this page
+    df = pd.read_sql(f"{select_sql} WHERE {where} ORDER BY {key_col} {order} LIMIT ?",
+                     conn, params=[*params, cursor, page_size + 1])
+    conn.close()
+
+    more = len(df) > page_size
+    df = df.iloc[:page_size]
+    if going_back:
+        df = df.iloc[::-1]
+    df = df.reset_index(drop=True)
+
+    key = key_col.split(".")[-1]
+    first_key = int(df[key].iloc[0]) if not df.empty else None
+    last_key = int(df[key].iloc[-1]) if not df.empty else None
+    if going_back:
+        return Page(df, first_key, last_key, has_prev=more, has_next=True)
+    return Page(df, first_key, last_key, has_prev=cursor != _NO_CURSOR, has_next=more)
 
 # --- FACULTY DATA ---
+@cached_query("faculty_master")
 def get_faculty_names():
     conn = get_connection()
     df = pd.read_sql("SELECT faculty_id, name FROM faculty_master", conn)
     conn.close()
     return df
 
+@cached_query("faculty_master")
 def get_faculty_profile(faculty_id):
     conn = get_connection()
     df = pd.read_sql("SELECT * FROM faculty_master WHERE faculty_id=?", conn, params=(faculty_id,))
     conn.close()
     return df
 
+@cached_query("faculty_master")
+def get_faculty_record(faculty_id):
+    """Single profile as a FacultyProfile (None if the ID is unknown)."""
+    conn = get_connection()
+    row = conn.execute("""
+        SELECT faculty_id, name, designation, department, joining_date
+        FROM faculty_master WHERE faculty_id=?
+    """, (faculty_id,)).fetchone()
+    conn.close()
+    return FacultyProfile(*row) if row else None
+
+class FacultyDirectory:
+    """
+    Read-only, in-memory index of faculty_master: id -> FacultyProfile,
+    lower-cased name -> ids, department -> ids, and a sorted list of names
+    (and of each word in them) for prefix search with bisect.
+    Get the shared instance from get_faculty_directory().
+    """
+    def __init__(self, profiles):
+        self._by_id = {p.faculty_id: p for p in profiles}
+        self._by_name = defaultdict(list)
+        self._by_department = defaultdict(list)
+        words = set()
+        for p in self._by_id.values():
+            name = (p.name or "").lower()
+            self._by_name[name].append(p.faculty_id)
+            self._by_department[p.department].append(p.faculty_id)
+            words.add((name, p.faculty_id))
+            words.update((word, p.faculty_id) for word in name.split())
+        self._prefix_index = sorted(words)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, faculty_id):
+        return faculty_id in self._by_id
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def get(self, faculty_id):
+        """The FacultyProfile for an ID, or None."""
+        return self._by_id.get(faculty_id)
+
+    def name_of(self, faculty_id, default=None):
+        profile = self._by_id.get(faculty_id)
+        return profile.name if profile else default
+
+    def label(self, faculty_id):
+        """Display label used by the faculty pickers: "Name (ID: 123)"."""
+        return f"{self.name_of(faculty_id, 'Unknown')} (ID: {faculty_id})"
+
+    def ids_for_name(self, name):
+        """IDs with exactly this name (case-insensitive); names are not unique."""
+        return list(self._by_name.get((name or "").lower(), ()))
+
+    @property
+    def departments(self):
+        return sorted(d for d in self._by_department if d is not None)
+
+    def in_department(self, department):
+        return [self._by_id[i] for i in self._by_department.get(department, ())]
+
+    def search(self, prefix, limit=None):
+        """Profiles whose name, or any word of it, starts with `prefix` (case-insensitive), by name."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return sorted(self, key=lambda p: (p.name or "", p.faculty_id))[:limit]
+        found = {}
+        start = bisect.bisect_left(self._prefix_index, (prefix,))
+        for word, faculty_id in itertools.islice(self._prefix_index, start, None):
+            if not word.startswith(prefix):
+                break
+            found[faculty_id] = self._by_id[faculty_id]
+        return sorted(found.values(), key=lambda p: (p.name or "", p.faculty_id))[:limit]
+
+@cached_query("faculty_master")
+def get_faculty_directory():
+    """The FacultyDirectory for the current faculty_master, rebuilt only after it changes."""
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT faculty_id, name, designation, department, joining_date FROM faculty_master").fetchall()
+    conn.close()
+    return FacultyDirectory(FacultyProfile(*row) for row in rows)
+
+# --- LEAVE LEDGER ---
+# leave_ledger keeps one row per (faculty, leave type) with the allocated,
+# bonus, used (Approved) and pending days. Every write that touches
+# leave_records or bonus_leaves adjusts it in the same transaction, so a
+# balance lookup is a single primary-key read.
+LEAVE_QUOTA = {'CL': 12, 'SL': 10, 'EL': 15, 'OD': 5}
+
+# Which ledger column a leave request's days count towards, by status
+LEDGER_BUCKETS = {'Approved': 'used', 'Pending': 'pending'}
+
+def _ledger_rows_sql(faculty_source):
+    """SELECT producing freshly computed ledger rows for the faculty IDs in `faculty_source`."""
+    quota_rows = ", ".join("(?, ?)" for _ in LEAVE_QUOTA)
+    return f"""
+        WITH quota(leave_type, allocated) AS (VALUES {quota_rows})
+        SELECT fac.faculty_id, q.leave_type, q.allocated,
+            (SELECT COALESCE(SUM(b.extra_days), 0) FROM bonus_leaves b
+             WHERE b.faculty_id = fac.faculty_id AND b.leave_type = q.leave_type),
+            (SELECT COALESCE(SUM(l.days_requested), 0) FROM leave_records l
+             WHERE l.faculty_id = fac.faculty_id AND l.status = 'Approved' AND l.type = q.leave_type),
+            (SELECT COALESCE(SUM(l.days_requested), 0) FROM leave_records l
+             WHERE l.faculty_id = fac.faculty_id AND l.status = 'Pending' AND l.type = q.leave_type)
+        FROM ({faculty_source}) fac
+        CROSS JOIN quota q
+    """
+
+def _quota_params():
+    return [value for item in LEAVE_QUOTA.items() for value in item]
+
+ALL_LEDGER_FACULTY = """
+    SELECT faculty_id FROM faculty_master
+    UNION SELECT faculty_id FROM leave_records
+    UNION SELECT faculty_id FROM bonus_leaves
+"""
+
+def _ensure_ledger_rows(cursor, faculty_id):
+    """Creates the faculty's ledger rows from current data if they are missing."""
+    if cursor.execute("SELECT 1 FROM leave_ledger WHERE faculty_id=? LIMIT 1", (faculty_id,)).fetchone():
+        return
+    cursor.execute(
+        "INSERT OR IGNORE INTO leave_ledger (faculty_id, leave_type, allocated, bonus, used, pending) "
+        + _ledger_rows_sql("SELECT ? AS faculty_id"),
+        _quota_params() + [faculty_id])
+
+def _adjust_ledger(cursor, faculty_id, leave_type, column, delta):
+    # `column` always comes from LEDGER_BUCKETS or 'bonus', never from user input
+    cursor.execute(f"UPDATE leave_ledger SET {column} = {column} + ? WHERE faculty_id=? AND leave_type=?",
+                   (delta, faculty_id, leave_type))
+
+def _move_ledger_days(cursor, faculty_id, leave_type, days, old_status, new_status):
+    old_bucket = LEDGER_BUCKETS.get(old_status)
+    new_bucket = LEDGER_BUCKETS.get(new_status)
+    if old_bucket == new_bucket:
+        return
+    if old_bucket:
+        _adjust_ledger(cursor, faculty_id, leave_type, old_bucket, -days)
+    if new_bucket:
+        _adjust_ledger(cursor, faculty_id, leave_type, new_bucket, days)
+
+def rebuild_leave_ledger(conn=None):
+    """
+    Recomputes every leave_ledger row from leave_records and bonus_leaves.
+    When a connection is passed in, the caller owns the transaction (this is
+    how migrations and the import scripts use it) and calls
+    invalidate_tables("leave_ledger") once it has committed. Returns the row count.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM leave_ledger")
+    cursor.execute(
+        "INSERT INTO leave_ledger (faculty_id, leave_type, allocated, bonus, used, pending) "
+        + _ledger_rows_sql(ALL_LEDGER_FACULTY),
+        _quota_params())
+    count = cursor.rowcount
+    if own_conn:
+        conn.commit()
+        conn.close()
+        invalidate_tables("leave_ledger")
+    return count
+
+def verify_leave_ledger():
+    """Returns the ledger rows that differ from a full recomputation (empty = consistent)."""
+    conn = get_connection()
+    cols = ["faculty_id", "leave_type", "allocated", "bonus", "used", "pending"]
+    stored = pd.read_sql("SELECT " + ", ".join(cols) + " FROM leave_ledger", conn)
+    expected = pd.DataFrame(conn.execute(_ledger_rows_sql(ALL_LEDGER_FACULTY), _quota_params()).fetchall(),
+                            columns=cols)
+    conn.close()
+
+    merged = expected.merge(stored, on=["faculty_id", "leave_type"], how="outer",
+                            suffixes=("_expected", "_stored"), indicator=True)
+    drift = merged["_merge"] != "both"
+    for col in cols[2:]:
+        drift |= merged[f"{col}_expected"] != merged[f"{col}_stored"]
+    return merged[drift].drop(columns="_merge").reset_index(drop=True)
+
 # --- LEAVE MANAGEMENT (FIXED) ---
+@cached_query("leave_ledger")
 def get_leave_balance(faculty_id, leave_type=None):
     """
     If leave_type is None -> Returns a DataFrame (Table) of ALL balances.
     If leave_type is provided (e.g. 'CL') -> Returns an Integer (Available Balance).
     """
-    conn = get_connection()
-    
-    # 1. Define Standard Quotas
-    quota = {'CL': 12, 'SL': 10, 'EL': 15, 'OD': 5}
-    
-    # 2. Add Bonus Leaves (Extensions)
-    try:
-        bonus_query = "SELECT leave_type, SUM(extra_days) as extra FROM bonus_leaves WHERE faculty_id=? GROUP BY leave_type"
-        bonus_df = pd.read_sql(bonus_query, conn, params=(faculty_id,))
-        for _, row in bonus_df.iterrows():
-            if row['leave_type'] in quota:
-                quota[row['leave_type']] += row['extra']
-    except:
-        pass # Table might not exist yet
-
-    # 3. Calculate Used Leaves (Approved only)
-    used_query = "SELECT type, SUM(days_requested) as used FROM leave_records WHERE faculty_id=? AND status='Approved' GROUP BY type"
-    used_df = pd.read_sql(used_query, conn, params=(faculty_id,))
-    used_dict = dict(zip(used_df['type'], used_df['used']))
-    
-    conn.close()
-
-    # 4. Build Balance Data
-    balance_data = []
-    for l_type, total_allowed in quota.items():
-        consumed = used_dict.get(l_type, 0)
-        remaining = total_allowed - consumed
-        balance_data.append({
-            "Leave Type": l_type, 
-            "Total Allocated": total_allowed, 
-            "Used": consumed, 
-            "Available Balance": remaining
-        })
-    
-    # 5. Return Logic
+    # Validation Mode: Return Number (one primary-key read)
     if leave_type:
-        # Validation Mode: Return Number
-        for item in balance_data:
-            if item["Leave Type"] == leave_type:
-                return item["Available Balance"]
-        return 0 
-    else:
-        # Dashboard Mode: Return Table
-        return pd.DataFrame(balance_data)
+        conn = get_connection()
+        row = conn.execute(
+            "SELECT allocated + bonus - used - pending FROM leave_ledger WHERE faculty_id=? AND leave_type=?",
+            (faculty_id, leave_type)).fetchone()
+        conn.close()
+        if row:
+            return row[0]
+        # No ledger rows yet means no leave history: the full quota is available
+        return LEAVE_QUOTA.get(leave_type, 0)
 
-def apply_for_leave(faculty_id, leave_type, days):
-    # 1. Check Balance using the validated function
-    balance = get_leave_balance(faculty_id, leave_type)
-    
-    if days > balance:
-        return False, f"❌ Insufficient Balance! You have {balance} {leave_type} remaining."
-    
-    # 2. Submit Request
+    # Dashboard Mode: Return Table
+    return pd.DataFrame([{
+        "Leave Type": b.leave_type,
+        "Total Allocated": b.total,
+        "Used": b.used,
+        "Pending": b.pending,
+        "Available Balance": b.available
+    } for b in get_leave_balances(faculty_id)])
+
+@cached_query("leave_ledger")
+def get_leave_balances(faculty_id):
+    """All of a faculty member's balances as LeaveBalance records, in LEAVE_QUOTA order."""
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO leave_records (faculty_id, type, days_requested, status) VALUES (?, ?, ?, 'Pending')", 
-                   (faculty_id, leave_type, days))
-    conn.commit()
+    rows = conn.execute(
+        "SELECT leave_type, allocated, bonus, used, pending FROM leave_ledger WHERE faculty_id=?",
+        (faculty_id,)).fetchall()
     conn.close()
-    return True, "✅ Leave request submitted successfully!"
+    ledger = {row[0]: LeaveBalance(*row) for row in rows}
+    return [ledger.get(l_type, LeaveBalance(l_type, quota, 0, 0, 0)) for l_type, quota in LEAVE_QUOTA.items()]
+
+def apply_for_leave(faculty_id, leave_type, days):
+    """
+    Checks the balance and reserves the days in one write transaction, so
+    concurrent submissions can never overdraw it.
+    """
+    if leave_type not in LEAVE_QUOTA:
+        return False, f"❌ Unknown leave type: {leave_type}"
+    # A zero or negative request would release reserved days and inflate the balance
+    if isinstance(days, bool) or not isinstance(days, numbers.Integral) or days <= 0:
+        return False, f"❌ Days requested must be a whole number of at least 1 (got {days!r})."
+    days = int(days)
 
+    def work(cursor):
+        # 1. Check Balance (pending requests already count as reserved)
+        _ensure_ledger_rows(cursor, faculty_id)
+        balance = cursor.execute(
+            "SELECT allocated + bonus - used - pending FROM leave_ledger WHERE faculty_id=? AND leave_type=?",
+            (faculty_id, leave_type)).fetchone()[0]
+        if days > balance:
+            return False, f"❌ Insufficient Balance! You have {balance} {leave_type} remaining (including pending requests)."
+
+        # 2. Submit Request and reserve the days
+        cursor.execute("INSERT INTO leave_records (faculty_id, type, days_requested, status) VALUES (?, ?, ?, 'Pending')",
+                       (faculty_id, leave_type, days))
+        _adjust_ledger(cursor, faculty_id, leave_type, "pending", days)
+        return True, "✅ Leave request submitted successfully!"
+
+    return _write_transaction(work, "leave_records", "leave_ledger")
+
+@cached_query("leave_records")
 def get_leave_history(faculty_id):
     conn = get_connection()
     query = "SELECT type, days_requested, status FROM leave_records WHERE faculty_id=? ORDER BY leave_id DESC"
@@ -97,11 +809,24 @@ def get_leave_history(faculty_id):
     conn.close()
     return df
 
+@cached_query("leave_records")
+def get_leave_history_page(faculty_id, cursor=None, page_size=PAGE_SIZE, direction="next"):
+    return _keyset_page("SELECT leave_id, type, days_requested, status FROM leave_records",
+                        "faculty_id=?", [faculty_id], "leave_id", cursor, page_size, direction)
+
+@cached_query("leave_records")
+def count_leave_history(faculty_id):
+    conn = get_connection()
+    count = conn.execute("SELECT COUNT(*) FROM leave_records WHERE faculty_id=?", (faculty_id,)).fetchone()[0]
+    conn.close()
+    return count
+
 # --- HOD FUNCTIONS ---
+@cached_query("leave_records", "faculty_master")
 def get_pending_leaves():
     conn = get_connection()
     query = """
-        SELECT l.leave_id, f.name, l.type, l.days_requested, l.status
+        SELECT l.leave_id, f.name, f.department, l.type, l.days_requested, l.status
         FROM leave_records l
         JOIN faculty_master f ON l.faculty_id = f.faculty_id
         WHERE l.status = 'Pending'
@@ -111,21 +836,92 @@ def get_pending_leaves():
     return df
 
 def update_leave_status(leave_id, status):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE leave_records SET status=? WHERE leave_id=?", (status, leave_id))
-    conn.commit()
-    conn.close()
+    def work(cursor):
+        row = cursor.execute("SELECT faculty_id, type, days_requested, status FROM leave_records WHERE leave_id=?",
+                             (leave_id,)).fetchone()
+        if row:
+            faculty_id, leave_type, days, old_status = row
+            _ensure_ledger_rows(cursor, faculty_id)
+            cursor.execute("UPDATE leave_records SET status=? WHERE leave_id=?", (status, leave_id))
+            _move_ledger_days(cursor, faculty_id, leave_type, days, old_status, status)
+
+    _write_transaction(work, "leave_records", "leave_ledger")
 
 def update_all_pending_leaves(new_status):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE leave_records SET status = ? WHERE status = 'Pending'", (new_status,))
-    count = cursor.rowcount
-    conn.commit()
-    conn.close()
-    return count
+    def work(cursor):
+        moved = cursor.execute("""
+            SELECT faculty_id, type, SUM(days_requested) FROM leave_records
+            WHERE status = 'Pending' GROUP BY faculty_id, type
+        """).fetchall()
+        for faculty_id in {row[0] for row in moved}:
+            _ensure_ledger_rows(cursor, faculty_id)
+        cursor.execute("UPDATE leave_records SET status = ? WHERE status = 'Pending'", (new_status,))
+        count = cursor.rowcount
+        for faculty_id, leave_type, days in moved:
+            _move_ledger_days(cursor, faculty_id, leave_type, days, 'Pending', new_status)
+        return count
+
+    return _write_transaction(work, "leave_records", "leave_ledger")
+
+DECISION_STATUSES = ('Approved', 'Rejected')
+# Bound parameters per IN (...) list, well under SQLite's variable limit
+IN_CHUNK = 500
+
+def apply_leave_decisions(decisions):
+    """
+    Applies a batch of HOD decisions [(leave_id, status), ...] in one
+    transaction; status is 'Approved' or 'Rejected'. Only requests that are
+    still Pending change (the first decision for a repeated leave_id wins).
+    Returns {leave_id: outcome}: the new status when applied, otherwise
+    'not pending', 'not found' or 'invalid status'.
+    """
+    wanted = {}
+    rejected = {}
+    for leave_id, status in decisions:
+        leave_id = int(leave_id)
+        if leave_id in wanted or leave_id in rejected:
+            continue
+        if status in DECISION_STATUSES:
+            wanted[leave_id] = status
+        else:
+            rejected[leave_id] = 'invalid status'
+
+    def work(cursor):
+        ids = list(wanted)
+        current = {}
+        for start in range(0, len(ids), IN_CHUNK):
+            chunk = ids[start:start + IN_CHUNK]
+            current.update((row[0], row[1:]) for row in cursor.execute(
+                f"SELECT leave_id, faculty_id, type, days_requested, status FROM leave_records "
+                f"WHERE leave_id IN ({', '.join('?' * len(chunk))})", chunk))
+
+        outcomes = dict(rejected)
+        updates = []
+        moved = defaultdict(int)  # (faculty, type, new status) -> days
+        for leave_id, status in wanted.items():
+            row = current.get(leave_id)
+            if row is None:
+                outcomes[leave_id] = 'not found'
+            elif row[3] != 'Pending':
+                outcomes[leave_id] = 'not pending'
+            else:
+                faculty_id, leave_type, days, _ = row
+                updates.append((status, leave_id))
+                moved[(faculty_id, leave_type, status)] += days or 0
+                outcomes[leave_id] = status
+
+        for faculty_id in {key[0] for key in moved}:
+            _ensure_ledger_rows(cursor, faculty_id)
+        cursor.executemany("UPDATE leave_records SET status=? WHERE leave_id=?", updates)
+        for (faculty_id, leave_type, status), days in moved.items():
+            _move_ledger_days(cursor, faculty_id, leave_type, days, 'Pending', status)
+        return outcomes
 
+    if not wanted:
+        return rejected
+    return _write_transaction(work, "leave_records", "leave_ledger")
+
+@cached_query("leave_records", "faculty_master")
 def get_all_past_leaves():
     conn = get_connection()
     query = """
@@ -139,60 +935,542 @@ def get_all_past_leaves():
     conn.close()
     return df
 
-def grant_bonus_leave(faculty_id, leave_type, days):
+@cached_query("leave_records", "faculty_master")
+def get_all_past_leaves_page(cursor=None, page_size=PAGE_SIZE, direction="next"):
+    return _keyset_page("""
+        SELECT l.leave_id, f.name, l.type, l.days_requested, l.status
+        FROM leave_records l
+        JOIN faculty_master f ON l.faculty_id = f.faculty_id
+    """, "l.status != 'Pending'", [], "l.leave_id", cursor, page_size, direction)
+
+@cached_query("leave_records")
+def count_past_leaves():
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO bonus_leaves (faculty_id, leave_type, extra_days, granted_date) VALUES (?, ?, ?, ?)",
-                   (faculty_id, leave_type, days, datetime.now().strftime("%Y-%m-%d")))
-    conn.commit()
+    count = conn.execute("""
+        SELECT COUNT(*) FROM leave_records l
+        JOIN faculty_master f ON l.faculty_id = f.faculty_id
+        WHERE l.status != 'Pending'
+    """).fetchone()[0]
     conn.close()
+    return count
+
+def grant_bonus_leave(faculty_id, leave_type, days):
+    def work(cursor):
+        _ensure_ledger_rows(cursor, faculty_id)
+        cursor.execute("INSERT INTO bonus_leaves (faculty_id, leave_type, extra_days, granted_date) VALUES (?, ?, ?, ?)",
+                       (faculty_id, leave_type, days, datetime.now().strftime("%Y-%m-%d")))
+        _adjust_ledger(cursor, faculty_id, leave_type, "bonus", days)
+
+    _write_transaction(work, "bonus_leaves", "leave_ledger")
 
 # --- STUDENT FEEDBACK ---
+@cached_query("student_feedback")
 def get_student_feedback(faculty_id):
     conn = get_connection()
     df = pd.read_sql("SELECT * FROM student_feedback WHERE faculty_id=?", conn, params=(faculty_id,))
     conn.close()
     return df
 
+@cached_query("student_feedback")
+def get_student_feedback_page(faculty_id, cursor=None, page_size=PAGE_SIZE, direction="next"):
+    return _keyset_page("SELECT * FROM student_feedback", "faculty_id=?", [faculty_id],
+                        "feedback_id", cursor, page_size, direction)
+
+@cached_query("student_feedback")
+def count_student_feedback(faculty_id):
+    conn = get_connection()
+    count = conn.execute("SELECT COUNT(*) FROM student_feedback WHERE faculty_id=?", (faculty_id,)).fetchone()[0]
+    conn.close()
+    return count
+
+# --- FEEDBACK AGGREGATES ---
+# feedback_stats holds per (faculty, course) review counts, rating sums, the
+# 1-5 rating histogram and sentiment counts. Triggers on student_feedback
+# keep it current (see schema_utils), so dashboards and scoring read a few
+# pre-aggregated rows instead of every review.
+_FEEDBACK_STATS_SUMS = """
+    SUM(review_count), SUM(rated_count), SUM(rating_sum),
+    SUM(rating_1), SUM(rating_2), SUM(rating_3), SUM(rating_4), SUM(rating_5),
+    SUM(positive_count), SUM(neutral_count), SUM(negative_count)
+"""
+
+def rebuild_feedback_stats(conn=None):
+    """
+    Recomputes feedback_stats from student_feedback in one grouped pass.
+    When a connection is passed in, the caller owns the transaction and calls
+    invalidate_tables("student_feedback") once it has committed.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+    conn.execute("DELETE FROM feedback_stats")
+    conn.execute("""
+        INSERT INTO feedback_stats
+            (faculty_id, course_name, review_count, rated_count, rating_sum,
+             rating_1, rating_2, rating_3, rating_4, rating_5,
+             positive_count, neutral_count, negative_count)
+        SELECT faculty_id, IFNULL(course_name, ''), COUNT(*), COUNT(rating), IFNULL(SUM(rating), 0),
+            SUM(rating IS 1), SUM(rating IS 2), SUM(rating IS 3), SUM(rating IS 4), SUM(rating IS 5),
+            SUM(sentiment_label IS 'Positive'), SUM(sentiment_label IS 'Neutral'), SUM(sentiment_label IS 'Negative')
+        FROM student_feedback
+        GROUP BY faculty_id, IFNULL(course_name, '')
+    """)
+    if own_conn:
+        conn.commit()
+        conn.close()
+        invalidate_tables("student_feedback")
+
+# Bulk loads (ETL scripts): pause the per-row triggers, load, then resume,
+# which rebuilds the aggregates in one grouped pass. Call both inside one
+# open transaction (BEGIN IMMEDIATE) - DROP TRIGGER outside one commits at once -
+# and invalidate_tables("student_feedback") after the commit.
+def pause_feedback_stats(conn):
+    for name in schema_utils.FEEDBACK_STATS_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def resume_feedback_stats(conn):
+    rebuild_feedback_stats(conn)
+    for sql in schema_utils.FEEDBACK_STATS_TRIGGERS.values():
+        conn.execute(sql)
+
+@cached_query("student_feedback")
+def get_feedback_summary(faculty_id):
+    """Review count, average rating, rating histogram and sentiment counts as a FeedbackSummary."""
+    conn = get_connection()
+    row = conn.execute(f"SELECT {_FEEDBACK_STATS_SUMS} FROM feedback_stats WHERE faculty_id=?",
+                       (faculty_id,)).fetchone()
+    conn.close()
+    (reviews, rated, rating_sum, r1, r2, r3, r4, r5, pos, neu, neg) = (v or 0 for v in row)
+    return FeedbackSummary(
+        review_count=reviews,
+        avg_rating=rating_sum / rated if rated else None,
+        rating_counts={1: r1, 2: r2, 3: r3, 4: r4, 5: r5},
+        sentiment_counts={'Positive': pos, 'Neutral': neu, 'Negative': neg},
+    )
+
+@cached_query("student_feedback")
+def get_course_feedback_stats(faculty_id):
+    """Per-course review count and average rating for one faculty member."""
+    conn = get_connection()
+    df = pd.read_sql("""
+        SELECT course_name, review_count AS reviews,
+               ROUND(CAST(rating_sum AS REAL) / NULLIF(rated_count, 0), 2) AS avg_rating
+        FROM feedback_stats WHERE faculty_id=? AND review_count > 0
+    """, conn, params=(faculty_id,))
+    conn.close()
+    return df
+
 # --- PERFORMANCE APPRAISAL ---
-def calculate_appraisal_score(faculty_id):
+ATTENDANCE_SCORE = 18  # Attendance (Max 20) -> Mock logic
+
+# Scoring rules. Plain arithmetic, so they work on numbers and on whole columns.
+def _feedback_points(avg_rating):
+    return avg_rating / 5 * 50  # Max 50
+
+def _research_points(publications, patents):
+    return np.minimum(30, publications * 5 + patents * 10)  # Max 30
+
+@cached_query("faculty_master", "student_feedback", "research_records")
+def calculate_appraisal_scores_bulk(department=None, faculty_ids=None):
+    """
+    Scores many faculty at once: one grouped query for feedback, one for research.
+    With no filters, scores everyone in faculty_master. Returns a DataFrame
+    ranked by total score (rank 1 = best).
+    """
     conn = get_connection()
-    
-    # 1. Feedback Score (Max 50)
-    feed_df = pd.read_sql("SELECT rating FROM student_feedback WHERE faculty_id=?", conn, params=(faculty_id,))
-    if not feed_df.empty:
-        avg_rating = feed_df['rating'].mean()
-        feedback_score = (avg_rating / 5) * 50
-    else:
-        feedback_score = 0
-        
-    # 2. Research Score (Max 30)
-    res_df = pd.read_sql("SELECT publications_count, patents_count FROM research_records WHERE faculty_id=?", conn, params=(faculty_id,))
-    if not res_df.empty:
-        pubs = res_df.iloc[0]['publications_count']
-        pats = res_df.iloc[0]['patents_count']
-        research_score = min(30, (pubs * 5) + (pats * 10))
+
+    # 1. Who is being scored
+    if faculty_ids is not None:
+        faculty_ids = list(faculty_ids)
+        id_marks = ", ".join("?" for _ in faculty_ids)
+        scope_sql, scope_params = f"faculty_id IN ({id_marks})", faculty_ids
+        base = pd.DataFrame({"faculty_id": pd.Series(faculty_ids, dtype="int64")})
+        names = pd.read_sql(f"SELECT faculty_id, name, department FROM faculty_master WHERE {scope_sql}",
+                            conn, params=scope_params)
+        base = base.merge(names.astype({"faculty_id": "int64"}), on="faculty_id", how="left")
     else:
-        research_score = 0
-        
-    # 3. Attendance (Max 20) -> Mock logic
-    attendance_score = 18 
-    
-    conn.close()
-    
-    total = int(feedback_score + research_score + attendance_score)
+        if department is not None:
+            scope_sql = "faculty_id IN (SELECT faculty_id FROM faculty_master WHERE department=?)"
+            scope_params = [department]
+            base = pd.read_sql("SELECT faculty_id, name, department FROM faculty_master WHERE department=?",
+                               conn, params=scope_params)
+        else:
+            scope_sql, scope_params = None, []
+            base = pd.read_sql("SELECT faculty_id, name, department FROM faculty_master", conn)
+
+    where = f"WHERE {scope_sql}" if scope_sql else ""
+
+    # 2. Feedback averages (one grouped query over the pre-aggregated stats)
+    feedback = pd.read_sql(f"""
+        SELECT faculty_id, CAST(SUM(rating_sum) AS REAL) / NULLIF(SUM(rated_count), 0) AS avg_rating
+        FROM feedback_stats {where} GROUP BY faculty_id
+    """, conn, params=scope_params)
+
+    # 3. Research counts (one grouped query). The bare columns come from the
+    # MIN(research_id) row, i.e. the faculty's first research record.
+    research = pd.read_sql(f"""
+        SELECT faculty_id, publications_count, patents_count, MIN(research_id) AS research_id
+        FROM research_records {where} GROUP BY faculty_id
+    """, conn, params=scope_params)
+    conn.close()
+
+    # Empty reads (e.g. faculty_ids=[]) come back with object keys; merge on one key dtype
+    base, feedback, research = (frame.astype({"faculty_id": "int64"}) for frame in (base, feedback, research))
+    df = base.merge(feedback, on="faculty_id", how="left").merge(
+        research.drop(columns="research_id"), on="faculty_id", how="left")
+
+    # 4. Vectorized scoring
+    df["feedback_score"] = _feedback_points(df["avg_rating"]).fillna(0.0)
+    df["research_score"] = _research_points(
+        df["publications_count"].fillna(0), df["patents_count"].fillna(0)).astype(int)
+    df["attendance_score"] = ATTENDANCE_SCORE
+    df["total"] = (df["feedback_score"] + df["research_score"] + df["attendance_score"]).astype(int)
+    df["rank"] = df["total"].rank(method="min", ascending=False).astype(int)
+
+    return df.sort_values(["rank", "faculty_id"]).reset_index(drop=True)
+
+@cached_query("student_feedback", "research_records")
+def get_appraisal(faculty_id):
+    """One faculty member's score as an AppraisalScore, using the same rules as the bulk scorer."""
+    conn = get_connection()
+    avg_rating = conn.execute("""
+        SELECT CAST(SUM(rating_sum) AS REAL) / NULLIF(SUM(rated_count), 0)
+        FROM feedback_stats WHERE faculty_id=?
+    """, (faculty_id,)).fetchone()[0]
+    research = conn.execute("""
+        SELECT publications_count, patents_count FROM research_records
+        WHERE faculty_id=? ORDER BY research_id LIMIT 1
+    """, (faculty_id,)).fetchone()
+    conn.close()
+
+    feedback_score = float(_feedback_points(avg_rating)) if avg_rating is not None else 0.0
+    research_score = int(_research_points(research[0] or 0, research[1] or 0)) if research else 0
+    return AppraisalScore(faculty_id, feedback_score, research_score, ATTENDANCE_SCORE)
+
+def get_appraisals_bulk(department=None):
+    """{faculty_id: AppraisalScore} for a whole department (or everyone), from the bulk scorer."""
+    df = calculate_appraisal_scores_bulk(department)
+    return {
+        int(fid): AppraisalScore(int(fid), float(feedback), int(research), int(attendance))
+        for fid, feedback, research, attendance in df[
+            ["faculty_id", "feedback_score", "research_score", "attendance_score"]].itertuples(index=False)
+    }
+
+def appraisal_breakdown(score):
+    """The report/UI form of an AppraisalScore."""
     return {
-        "total": total,
+        "total": score.total,
         "breakdown": {
-            "Feedback (50%)": round(feedback_score, 1),
-            "Research (30%)": round(research_score, 1),
-            "Attendance (20%)": attendance_score
+            "Feedback (50%)": round(score.feedback_score, 1),
+            "Research (30%)": score.research_score,
+            "Attendance (20%)": score.attendance_score
         }
     }
 
+def calculate_appraisal_score(faculty_id):
+    return appraisal_breakdown(get_appraisal(faculty_id))
+
+def sync_faculty_profile(faculty_id):
+    """
+    Adds what an appraisal needs and a profile is missing: a research record
+    (zero counts), a placeholder review and the leave ledger rows.
+    Returns the names of the rows it added (empty = nothing was missing).
+    """
+    def work(cursor):
+        added = []
+        if not cursor.execute("SELECT 1 FROM research_records WHERE faculty_id=? LIMIT 1", (faculty_id,)).fetchone():
+            cursor.execute("INSERT INTO research_records (faculty_id, publications_count, patents_count, projects_count) "
+                           "VALUES (?, 0, 0, 0)", (faculty_id,))
+            added.append("research record")
+        if not cursor.execute("SELECT 1 FROM student_feedback WHERE faculty_id=? LIMIT 1", (faculty_id,)).fetchone():
+            cursor.execute("INSERT INTO student_feedback (faculty_id, course_name, rating, feedback_comment, sentiment_label) "
+                           "VALUES (?, 'CS101', 5, 'Auto-Fix', 'Positive')", (faculty_id,))
+            added.append("placeholder review")
+        _ensure_ledger_rows(cursor, faculty_id)
+        return added
+
+    return _write_transaction(work, "research_records", "student_feedback", "leave_ledger")
+
 # --- TEACHING TRACKER ---
+@cached_query("teaching_progress")
 def get_teaching_progress(faculty_id):
     conn = get_connection()
-    df = pd.read_sql("SELECT * FROM teaching_progress WHERE faculty_id=?", conn, params=(faculty_id,))
+    df = pd.read_sql("SELECT * FROM teaching_progress WHERE faculty_id=? ORDER BY week_number", conn, params=(faculty_id,))
+    conn.close()
+    return df
+
+# --- DEPARTMENT OVERVIEW ---
+# The teaching plan spreads the syllabus evenly over the semester, so by
+# week w a class should be at w / SEMESTER_WEEKS of it.
+SEMESTER_WEEKS = 12
+
+def _department_scope(department):
+    """WHERE clause and params limiting a faculty_id-keyed table to one department (None = all)."""
+    if department is None:
+        return "", []
+    return "WHERE faculty_id IN (SELECT faculty_id FROM faculty_master WHERE department=?)", [department]
+
+@cached_query("faculty_master", "student_feedback", "research_records", "leave_ledger", "teaching_progress")
+def get_department_overview(department=None):
+    """
+    One row per faculty member (optionally one department) with average
+    rating, appraisal score and rank, leave utilisation and teaching lag.
+    Built from grouped queries, so the cost does not grow with N calls.
+    teaching_lag_pct > 0 means behind the plan at the latest reported week.
+    """
+    scores = calculate_appraisal_scores_bulk(department)
+
+    conn = get_connection()
+    where, params = _department_scope(department)
+    leave = pd.read_sql(f"""
+        SELECT faculty_id, SUM(used) AS leave_used, SUM(allocated + bonus) AS leave_allowed
+        FROM leave_ledger {where} GROUP BY faculty_id
+    """, conn, params=params)
+    # The bare completion column comes from the MAX(week_number) row
+    teaching = pd.read_sql(f"""
+        SELECT faculty_id, MAX(week_number) AS latest_week, teacher_completion_pct AS completion_pct
+        FROM teaching_progress {where} GROUP BY faculty_id
+    """, conn, params=params)
     conn.close()
+
+    df = scores[["faculty_id", "name", "department", "avg_rating", "total", "rank"]].merge(
+        leave, on="faculty_id", how="left").merge(teaching, on="faculty_id", how="left")
+    # No ledger rows yet = nothing used out of the default quota
+    df["leave_used"] = df["leave_used"].fillna(0).astype(int)
+    df["leave_allowed"] = df["leave_allowed"].fillna(sum(LEAVE_QUOTA.values())).astype(int)
+    df["leave_utilisation_pct"] = (df["leave_used"] / df["leave_allowed"] * 100).round(1)
+    df["teaching_lag_pct"] = (df["latest_week"] / SEMESTER_WEEKS * 100 - df["completion_pct"]).round(1)
     return df
+
+def get_department_summary():
+    """Per-department averages of get_department_overview(), one row per department."""
+    df = get_department_overview()
+    summary = df.groupby("department", dropna=False).agg(
+        faculty=("faculty_id", "count"),
+        avg_rating=("avg_rating", "mean"),
+        avg_score=("total", "mean"),
+        leave_used=("leave_used", "sum"),
+        leave_allowed=("leave_allowed", "sum"),
+        teaching_lag_pct=("teaching_lag_pct", "mean"),
+    ).reset_index()
+    summary["leave_utilisation_pct"] = (summary["leave_used"] / summary["leave_allowed"] * 100).round(1)
+    return summary.drop(columns=["leave_used", "leave_allowed"]).round(
+        {"avg_rating": 2, "avg_score": 1, "teaching_lag_pct": 1})
+
+@cached_query("faculty_master", "student_feedback")
+def get_rating_histograms(department=None):
+    """Per-faculty counts of 1-5 star ratings (columns rating_1..rating_5), one grouped query."""
+    conn = get_connection()
+    where, params = _department_scope(department)
+    df = pd.read_sql(f"""
+        SELECT faculty_id, SUM(rating_1) AS rating_1, SUM(rating_2) AS rating_2, SUM(rating_3) AS rating_3,
+               SUM(rating_4) AS rating_4, SUM(rating_5) AS rating_5
+        FROM feedback_stats {where} GROUP BY faculty_id
+    """, conn, params=params)
+    conn.close()
+    return df
+
+@cached_query("faculty_master", "teaching_progress")
+def get_teaching_curves(department=None):
+    """Every faculty member's weekly completion figures, ordered by faculty and week."""
+    conn = get_connection()
+    where, params = _department_scope(department)
+    df = pd.read_sql(f"""
+        SELECT faculty_id, week_number, teacher_completion_pct, student_avg_pct
+        FROM teaching_progress {where} ORDER BY faculty_id, week_number
+    """, conn, params=params)
+    conn.close()
+    return df
+
+# --- BACKGROUND JOBS ---
+# The jobs table is the queue behind job_utils: the app enqueues, worker
+# threads (or job_worker.py) claim, report progress and finish jobs. Rows
+# change on every progress tick, from other threads and processes, so these
+# reads are not cached. Timestamps use the same text format as the rest of
+# the schema, so they compare correctly as strings.
+JOB_COLUMNS = """job_id, kind, params, owner, status, progress, total, message,
+    artifact_name, artifact_mime, artifact_bytes, attempts,
+    created_at, started_at, finished_at, expires_at, downloaded_at"""
+
+def _job_time(seconds_from_now=0):
+    return (datetime.now() + timedelta(seconds=seconds_from_now)).strftime("%Y-%m-%d %H:%M:%S")
+
+def _job_from_row(row):
+    return Job(row[0], row[1], json.loads(row[2]), *row[3:])
+
+def enqueue_job(kind, params, owner=None):
+    """
+    Queues a job and returns its ID. If the same owner already has the same
+    job queued or running, returns that one instead of queueing it twice.
+    """
+    params_json = json.dumps(params, sort_keys=True)
+
+    def work(cursor):
+        row = cursor.execute("""
+            SELECT job_id FROM jobs
+            WHERE owner IS ? AND kind=? AND params=? AND status IN ('queued', 'running')
+        """, (owner, kind, params_json)).fetchone()
+        if row:
+            return row[0]
+        cursor.execute("INSERT INTO jobs (kind, params, owner, created_at) VALUES (?, ?, ?, ?)",
+                       (kind, params_json, owner, _job_time()))
+        return cursor.lastrowid
+
+    return _write_transaction(work, "jobs")
+
+def claim_next_job(worker):
+    """Marks the oldest queued job as running on `worker` and returns it (None if the queue is empty)."""
+    # Idle workers poll: check with a plain read before taking the write lock
+    conn = get_connection()
+    queued = conn.execute("SELECT 1 FROM jobs WHERE status='queued' LIMIT 1").fetchone()
+    conn.close()
+    if not queued:
+        return None
+
+    def work(cursor):
+        row = cursor.execute("SELECT job_id FROM jobs WHERE status='queued' ORDER BY job_id LIMIT 1").fetchone()
+        if row is None:
+            return None
+        now = _job_time()
+        cursor.execute("""
+            UPDATE jobs SET status='running', worker=?, attempts=attempts + 1,
+                started_at=?, heartbeat_at=?, progress=0, total=0, message=NULL
+            WHERE job_id=?
+        """, (worker, now, now, row[0]))
+        return _job_from_row(cursor.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE job_id=?", (row[0],)).fetchone())
+
+    return _write_transaction(work, "jobs")
+
+def update_job_progress(job_id, progress, total, message=None):
+    """Records progress of a running job. Returns False once the job is no longer running (e.g. cancelled)."""
+    def work(cursor):
+        cursor.execute("""
+            UPDATE jobs SET progress=?, total=?, message=COALESCE(?, message), heartbeat_at=?
+            WHERE job_id=? AND status='running'
+        """, (progress, total, message, _job_time(), job_id))
+        return cursor.rowcount == 1
+
+    return _write_transaction(work, "jobs")
+
+def heartbeat_jobs(worker):
+    """Marks every job running on `worker` as still alive."""
+    def work(cursor):
+        cursor.execute("UPDATE jobs SET heartbeat_at=? WHERE status='running' AND worker=?", (_job_time(), worker))
+
+    _write_transaction(work, "jobs")
+
+def finish_job(job_id, message, artifact_name=None, artifact_mime=None, artifact_bytes=None, keep_for=None):
+    """Marks a running job done; its artifact (if any) expires `keep_for` seconds from now."""
+    expires_at = _job_time(keep_for) if keep_for is not None else None
+
+    def work(cursor):
+        cursor.execute("""
+            UPDATE jobs SET status='done', progress=MAX(progress, total), message=?, artifact_name=?,
+                artifact_mime=?, artifact_bytes=?, finished_at=?, expires_at=?
+            WHERE job_id=? AND status='running'
+        """, (message, artifact_name, artifact_mime, artifact_bytes, _job_time(), expires_at, job_id))
+        return cursor.rowcount == 1
+
+    return _write_transaction(work, "jobs")
+
+def fail_job(job_id, message):
+    def work(cursor):
+        cursor.execute("UPDATE jobs SET status='failed', message=?, finished_at=? WHERE job_id=? AND status='running'",
+                       (message, _job_time(), job_id))
+
+    _write_transaction(work, "jobs")
+
+def cancel_job(job_id):
+    """Cancels a queued or running job; a running one stops at its next progress update."""
+    def work(cursor):
+        cursor.execute("""
+            UPDATE jobs SET status='cancelled', message='Cancelled', finished_at=?
+            WHERE job_id=? AND status IN ('queued', 'running')
+        """, (_job_time(), job_id))
+        return cursor.rowcount == 1
+
+    return _write_transaction(work, "jobs")
+
+def mark_job_downloaded(job_id, keep_for):
+    """Records a download; the artifact is then kept at most `keep_for` more seconds."""
+    def work(cursor):
+        now = _job_time()
+        cursor.execute("""
+            UPDATE jobs SET downloaded_at=COALESCE(downloaded_at, ?), expires_at=MIN(expires_at, ?)
+            WHERE job_id=? AND status='done'
+        """, (now, _job_time(keep_for), job_id))
+
+    _write_transaction(work, "jobs")
+
+def requeue_stale_jobs(stale_after, max_attempts):
+    """
+    Running jobs whose worker has not sent a heartbeat for `stale_after`
+    seconds (it crashed or the app restarted) go back to the queue, or fail
+    once they have been tried `max_attempts` times. Returns (requeued, failed).
+    """
+    def work(cursor):
+        stale_before = _job_time(-stale_after)
+        cursor.execute("""
+            UPDATE jobs SET status='failed', message='Worker stopped too many times', finished_at=?
+            WHERE status='running' AND heartbeat_at < ? AND attempts >= ?
+        """, (_job_time(), stale_before, max_attempts))
+        failed = cursor.rowcount
+        cursor.execute("""
+            UPDATE jobs SET status='queued', worker=NULL, message='Requeued after a worker stopped'
+            WHERE status='running' AND heartbeat_at < ?
+        """, (stale_before,))
+        return cursor.rowcount, failed
+
+    return _write_transaction(work, "jobs")
+
+def expire_jobs():
+    """Marks finished jobs past their expiry as expired. Returns their IDs (their artifacts can be deleted)."""
+    def work(cursor):
+        now = _job_time()
+        ids = [row[0] for row in cursor.execute(
+            "SELECT job_id FROM jobs WHERE status='done' AND expires_at < ?", (now,)).fetchall()]
+        cursor.executemany("UPDATE jobs SET status='expired' WHERE job_id=?", [(i,) for i in ids])
+        return ids
+
+    return _write_transaction(work, "jobs")
+
+def purge_job_history(older_than):
+    """
+    Deletes jobs that finished more than `older_than` seconds ago and have no
+    file left: failed, cancelled and expired ones, and done ones that made none.
+    """
+    def work(cursor):
+        cursor.execute("""
+            DELETE FROM jobs
+            WHERE (status IN ('failed', 'cancelled', 'expired') OR (status = 'done' AND artifact_name IS NULL))
+              AND finished_at < ?
+        """, (_job_time(-older_than),))
+        return cursor.rowcount
+
+    return _write_transaction(work, "jobs")
+
+def get_job(job_id):
+    """One job as a Job record (None if unknown)."""
+    conn = get_connection()
+    row = conn.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+    conn.close()
+    return _job_from_row(row) if row else None
+
+def list_jobs(owner=None, limit=20):
+    """The most recent jobs of one owner (None = everyone's), newest first."""
+    conn = get_connection()
+    if owner is None:
+        rows = conn.execute(f"SELECT {JOB_COLUMNS} FROM jobs ORDER BY job_id DESC LIMIT ?", (limit,)).fetchall()
+    else:
+        rows = conn.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE owner=? ORDER BY job_id DESC LIMIT ?",
+                            (owner, limit)).fetchall()
+    conn.close()
+    return [_job_from_row(row) for row in rows]
+
+def get_job_counts():
+    """{status: number of jobs}."""
+    conn = get_connection()
+    rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+    conn.close()
+    return dict(rows)
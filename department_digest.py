@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+import digest_utils
+import db_utils as db
+import schema_utils
+
+# Writes the multi-page department appraisal digest (ranking, charts and a
+# panel per faculty member) as one PDF.
+#   python department_digest.py                      -> all departments
+#   python department_digest.py --department "CSE"   -> one department
+#   python department_digest.py --output digest.pdf
+
+def show_progress(page, pages):
+    sys.stdout.write(f"\r   Page {page}/{pages}")
+    sys.stdout.flush()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Department appraisal digest")
+    parser.add_argument("--department", help="only this department (default: all faculty)")
+    parser.add_argument("--output", default="Department_Digest.pdf", help="PDF file to write")
+    args = parser.parse_args()
+
+    conn = db.get_connection()
+    schema_utils.migrate(conn)
+    conn.close()
+
+    if args.department and args.department not in db.get_faculty_directory().departments:
+        print(f"❌ Unknown department: {args.department}")
+        sys.exit(1)
+
+    print(f"📑 BUILDING DEPARTMENT DIGEST ({args.department or 'all departments'})...")
+    stats = digest_utils.generate_department_digest(args.output, args.department, progress=show_progress)
+    print()
+    print(f"✅ {stats['faculty']} faculty on {stats['pages']} pages in {stats['seconds']}s "
+          f"-> {os.path.abspath(args.output)} ({os.path.getsize(args.output) / 1024:.0f} KB)")
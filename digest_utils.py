@@ -0,0 +1,398 @@
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from reportlab.lib import colors
+import db_utils as db
+import math
+import time
+import numpy as np
+from datetime import datetime
+
+# ==========================================
+# 📑 DEPARTMENT APPRAISAL DIGEST
+# ==========================================
+# One multi-page PDF per department (or for everyone):
+#   page 1      headline numbers, score / leave distributions and the
+#               department's average teaching curve
+#   ranking     every faculty member ranked by appraisal score
+#   panels      one small panel per faculty member: rating histogram,
+#               teaching completion vs. plan, leave utilisation
+# All data comes from four grouped queries (overview, rating histograms,
+# teaching curves, department summary), never one query per person.
+# Charts are plain vector paths. Whatever repeats - page footer, the ranking
+# grid, the panel frame with its axes and plan line - is drawn once per
+# document as a form XObject and placed on every page; each page only adds
+# its own numbers. showPage compresses each finished page, but reportlab
+# keeps every page's stream in the document until save(), so peak memory
+# grows with the page count: roughly the compressed PDF plus the four data
+# frames (see the Peak column of bench_department_digest.py).
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = 40
+RANK_ROWS_PER_PAGE = 40
+RANK_ROW_HEIGHT = 16
+PANEL_COLS, PANEL_ROWS = 2, 4
+PANEL_GAP = 12
+PANEL_WIDTH = (PAGE_WIDTH - 2 * MARGIN - PANEL_GAP) / PANEL_COLS
+PANEL_HEIGHT = (PAGE_HEIGHT - 2 * MARGIN - 30 - (PANEL_ROWS - 1) * PANEL_GAP) / PANEL_ROWS
+
+# Panel chart boxes, relative to the panel's lower-left corner
+HIST_BOX = (10, 34, 96, PANEL_HEIGHT - 80)
+CURVE_BOX = (126, 34, PANEL_WIDTH - 138, PANEL_HEIGHT - 80)
+LEAVE_TRACK = (52, 10, PANEL_WIDTH - 120, 9)
+
+# Ranking columns: (title, x offset, alignment)
+RANK_COLUMNS = (
+    ("Rank", 4, "left"), ("Name", 40, "left"), ("Department", 200, "left"),
+    ("Avg Rating", 340, "right"), ("Score", 385, "right"), ("Leave Used", 400, "left"),
+    ("Teaching Lag", PAGE_WIDTH - 2 * MARGIN - 4, "right"),
+)
+LEAVE_BAR = (400, 60)  # x offset and width of the mini bar in the Leave Used column
+
+RATING_COLOR = colors.HexColor("#4C72B0")
+TEACHER_COLOR = colors.darkblue
+STUDENT_COLOR = colors.HexColor("#DD8452")
+
+def _fmt(value, pattern, missing="-"):
+    return missing if value is None or (isinstance(value, float) and math.isnan(value)) else pattern.format(value)
+
+def _leave_color(pct):
+    if pct >= 90:
+        return colors.red
+    if pct >= 70:
+        return colors.orange
+    return colors.green
+
+# --- REUSABLE FORMS (drawn once per document) ---
+def _footer_form(c, scope_label):
+    c.beginForm("DigestFooter", 0, 0, PAGE_WIDTH, MARGIN)
+    c.setStrokeColor(colors.lightgrey)
+    c.line(MARGIN, MARGIN - 12, PAGE_WIDTH - MARGIN, MARGIN - 12)
+    c.setFillColor(colors.grey)
+    c.setFont("Helvetica", 8)
+    c.drawString(MARGIN, MARGIN - 24, f"EduHR-Gen · Department Appraisal Digest · {scope_label}")
+    c.endForm()
+
+def _rank_grid(c, rows):
+    """Column titles, zebra stripes and empty leave bars for `rows` ranking rows."""
+    top = PAGE_HEIGHT - MARGIN - 40
+    c.setFillColor(colors.HexColor("#DDE4EE"))
+    c.rect(MARGIN, top, PAGE_WIDTH - 2 * MARGIN, RANK_ROW_HEIGHT + 2, fill=1, stroke=0)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 9)
+    for title, x, align in RANK_COLUMNS:
+        if align == "right":
+            c.drawRightString(MARGIN + x, top + 5, title)
+        else:
+            c.drawString(MARGIN + x, top + 5, title)
+    for i in range(rows):
+        y = top - (i + 1) * RANK_ROW_HEIGHT
+        if i % 2:
+            c.setFillColor(colors.HexColor("#F4F6F9"))
+            c.rect(MARGIN, y, PAGE_WIDTH - 2 * MARGIN, RANK_ROW_HEIGHT, fill=1, stroke=0)
+        c.setStrokeColor(colors.lightgrey)
+        c.rect(MARGIN + LEAVE_BAR[0], y + 4, LEAVE_BAR[1], 7, fill=0, stroke=1)
+
+def _rank_form(c):
+    c.beginForm("RankGrid")
+    _rank_grid(c, RANK_ROWS_PER_PAGE)
+    c.endForm()
+
+def _panel_form(c):
+    """Panel frame, chart axes, labels and the teaching plan line."""
+    c.beginForm("FacultyPanel", 0, 0, PANEL_WIDTH, PANEL_HEIGHT)
+    c.setStrokeColor(colors.lightgrey)
+    c.roundRect(0, 0, PANEL_WIDTH, PANEL_HEIGHT, 6, fill=0, stroke=1)
+
+    c.setFillColor(colors.grey)
+    c.setFont("Helvetica", 7)
+    # Rating histogram: baseline and star labels
+    x, y, w, h = HIST_BOX
+    c.drawString(x, y + h + 4, "Ratings")
+    c.setStrokeColor(colors.grey)
+    c.line(x, y, x + w, y)
+    for star in range(1, 6):
+        c.drawCentredString(x + (star - 0.5) * w / 5, y - 8, str(star))
+
+    # Teaching curves: box, 50% gridline, week labels and the plan line
+    x, y, w, h = CURVE_BOX
+    c.drawString(x, y + h + 4, "Teaching completion % (plan dotted)")
+    c.setStrokeColor(colors.lightgrey)
+    c.rect(x, y, w, h, fill=0, stroke=1)
+    c.line(x, y + h / 2, x + w, y + h / 2)
+    c.drawRightString(x - 2, y - 2, "0")
+    c.drawRightString(x - 2, y + h - 3, "100")
+    for week in (1, db.SEMESTER_WEEKS // 2, db.SEMESTER_WEEKS):
+        c.drawCentredString(x + week / db.SEMESTER_WEEKS * w, y - 8, f"w{week}")
+    c.setStrokeColor(colors.grey)
+    c.setDash(1, 2)
+    c.line(x, y, x + w, y + h)
+    c.setDash()
+
+    # Leave utilisation track
+    x, y, w, h = LEAVE_TRACK
+    c.drawString(10, y + 1, "Leave used")
+    c.setStrokeColor(colors.lightgrey)
+    c.rect(x, y, w, h, fill=0, stroke=1)
+    c.endForm()
+
+# --- PAGES ---
+def _page_footer(c, page, pages):
+    c.doForm("DigestFooter")
+    c.setFillColor(colors.grey)
+    c.setFont("Helvetica", 8)
+    c.drawRightString(PAGE_WIDTH - MARGIN, MARGIN - 24, f"Page {page} of {pages}")
+
+def _bar_chart(c, x, y, w, h, title, labels, values, color):
+    """Vertical bars with value labels, drawn directly (cover page charts)."""
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(x, y + h + 8, title)
+    c.setStrokeColor(colors.grey)
+    c.line(x, y, x + w, y)
+    top = max(values) or 1
+    slot = w / len(values)
+    c.setFont("Helvetica", 7)
+    for i, (label, value) in enumerate(zip(labels, values)):
+        bar_h = value / top * (h - 12)
+        c.setFillColor(color)
+        c.rect(x + i * slot + 2, y, slot - 4, bar_h, fill=1, stroke=0)
+        c.setFillColor(colors.black)
+        c.drawCentredString(x + (i + 0.5) * slot, y + bar_h + 2, str(value))
+        c.drawCentredString(x + (i + 0.5) * slot, y - 9, label)
+
+def _draw_cover(c, scope_label, overview, curves, summary):
+    width, height = letter
+    c.setFont("Helvetica-Bold", 20)
+    c.drawString(MARGIN, height - 60, "Department Appraisal Digest")
+    c.setFont("Helvetica", 11)
+    c.drawString(MARGIN, height - 78, f"{scope_label} · {len(overview)} faculty · "
+                                      f"generated {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    c.line(MARGIN, height - 88, width - MARGIN, height - 88)
+
+    # Headline numbers
+    leave_pct = overview['leave_used'].sum() / overview['leave_allowed'].sum() * 100 if len(overview) else 0
+    kpis = [
+        ("Faculty", str(len(overview))),
+        ("Avg Rating", _fmt(overview['avg_rating'].mean(), "{:.2f}/5")),
+        ("Avg Score", _fmt(overview['total'].mean(), "{:.1f}")),
+        ("Leave Used", f"{leave_pct:.1f}%"),
+        ("Avg Teaching Lag", _fmt(overview['teaching_lag_pct'].mean(), "{:.1f} pts")),
+    ]
+    box_w = (width - 2 * MARGIN - 4 * 8) / len(kpis)
+    for i, (label, value) in enumerate(kpis):
+        x = MARGIN + i * (box_w + 8)
+        c.setFillColor(colors.aliceblue)
+        c.setStrokeColor(colors.darkblue)
+        c.roundRect(x, height - 150, box_w, 48, 6, fill=1, stroke=1)
+        c.setFillColor(colors.darkblue)
+        c.setFont("Helvetica", 8)
+        c.drawCentredString(x + box_w / 2, height - 116, label)
+        c.setFont("Helvetica-Bold", 14)
+        c.drawCentredString(x + box_w / 2, height - 138, value)
+
+    # Score and leave utilisation distributions
+    chart_w = (width - 2 * MARGIN - 30) / 2
+    scores = np.histogram(overview['total'].clip(0, 100), bins=10, range=(0, 100))[0]
+    _bar_chart(c, MARGIN, height - 330, chart_w, 140, "Appraisal score distribution",
+               [f"{b}-{b + 9}" for b in range(0, 90, 10)] + ["90-100"], scores.tolist(), RATING_COLOR)
+    leave = np.histogram(overview['leave_utilisation_pct'].clip(0, 100), bins=5, range=(0, 100))[0]
+    _bar_chart(c, MARGIN + chart_w + 30, height - 330, chart_w, 140, "Leave utilisation (% of quota)",
+               ["0-20", "20-40", "40-60", "60-80", "80-100"], leave.tolist(), colors.HexColor("#55A868"))
+
+    # Department average teaching curve vs. plan
+    x, y, w, h = MARGIN, height - 540, width - 2 * MARGIN, 150
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(x, y + h + 8, "Average teaching completion by week (teacher solid, students orange, plan dotted)")
+    c.setStrokeColor(colors.lightgrey)
+    c.rect(x, y, w, h, fill=0, stroke=1)
+    c.setFont("Helvetica", 7)
+    for week in range(1, db.SEMESTER_WEEKS + 1):
+        c.drawCentredString(x + week / db.SEMESTER_WEEKS * w, y - 9, f"w{week}")
+    c.setStrokeColor(colors.grey)
+    c.setDash(1, 2)
+    c.line(x, y, x + w, y + h)
+    c.setDash()
+    if len(curves):
+        weekly = curves.groupby('week_number')[['teacher_completion_pct', 'student_avg_pct']].mean()
+        weeks = weekly.index.to_numpy()
+        _polyline(c, x, y, w, h, weeks, weekly['teacher_completion_pct'].to_numpy(), TEACHER_COLOR)
+        _polyline(c, x, y, w, h, weeks, weekly['student_avg_pct'].to_numpy(), STUDENT_COLOR)
+
+    # Per-department summary (all-department digests only)
+    if summary is not None:
+        top = height - 590
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(MARGIN, top, "By department")
+        c.setFont("Helvetica-Bold", 8)
+        headers = [("Department", 0), ("Faculty", 180), ("Avg Rating", 240), ("Avg Score", 310),
+                   ("Leave Used %", 380), ("Teaching Lag", 460)]
+        for title, dx in headers:
+            c.drawString(MARGIN + dx, top - 16, title)
+        c.setFont("Helvetica", 8)
+        for i, row in enumerate(summary.head(10).itertuples(index=False)):
+            yy = top - 30 - i * 12
+            c.drawString(MARGIN, yy, str(row.department))
+            c.drawString(MARGIN + 180, yy, str(row.faculty))
+            c.drawString(MARGIN + 240, yy, _fmt(row.avg_rating, "{:.2f}"))
+            c.drawString(MARGIN + 310, yy, _fmt(row.avg_score, "{:.1f}"))
+            c.drawString(MARGIN + 380, yy, _fmt(row.leave_utilisation_pct, "{:.1f}"))
+            c.drawString(MARGIN + 460, yy, _fmt(row.teaching_lag_pct, "{:.1f}"))
+
+def _polyline(c, x, y, w, h, weeks, pcts, color):
+    # One path operator string per curve: reportlab's per-point path API
+    # formats every coordinate separately, which dominates at 1,000+ curves
+    points = [(x + week / db.SEMESTER_WEEKS * w, y + min(max(pct, 0), 100) / 100 * h)
+              for week, pct in zip(weeks.tolist(), pcts.tolist())]
+    if len(points) < 2:
+        return
+    ops = [f"{points[0][0]:.2f} {points[0][1]:.2f} m"] + [f"{px:.2f} {py:.2f} l" for px, py in points[1:]]
+    c.setStrokeColor(color)
+    c.setLineWidth(1.2)
+    c.addLiteral(" ".join(ops) + " S")
+    c.setLineWidth(1)
+
+def _draw_ranking_page(c, rows):
+    top = PAGE_HEIGHT - MARGIN - 40
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(MARGIN, PAGE_HEIGHT - MARGIN - 12, "Ranked Appraisal Scores")
+    if len(rows) == RANK_ROWS_PER_PAGE:
+        c.doForm("RankGrid")
+    else:
+        _rank_grid(c, len(rows))
+
+    c.setFont("Helvetica", 8)
+    for i, row in enumerate(rows.itertuples(index=False)):
+        y = top - (i + 1) * RANK_ROW_HEIGHT + 5
+        c.setFillColor(colors.black)
+        c.drawString(MARGIN + 4, y, str(row.rank))
+        c.drawString(MARGIN + 40, y, str(row.name)[:30])
+        c.drawString(MARGIN + 200, y, str(row.department)[:26])
+        c.drawRightString(MARGIN + 340, y, _fmt(row.avg_rating, "{:.2f}"))
+        c.drawRightString(MARGIN + 385, y, str(row.total))
+        pct = row.leave_utilisation_pct
+        c.setFillColor(_leave_color(pct))
+        c.rect(MARGIN + LEAVE_BAR[0], y - 1, LEAVE_BAR[1] * min(pct, 100) / 100, 7, fill=1, stroke=0)
+        c.setFillColor(colors.black)
+        c.drawString(MARGIN + LEAVE_BAR[0] + LEAVE_BAR[1] + 4, y, f"{pct:.0f}%")
+        c.drawRightString(PAGE_WIDTH - MARGIN - 4, y, _fmt(row.teaching_lag_pct, "{:+.1f}"))
+
+def _draw_panel(c, row, histogram, curve):
+    c.saveState()
+    c.translate(*_panel_origin(row.slot))
+    c.doForm("FacultyPanel")
+
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 9)
+    c.drawString(10, PANEL_HEIGHT - 16, str(row.name)[:40])
+    c.setFont("Helvetica", 7.5)
+    c.drawString(10, PANEL_HEIGHT - 28, f"#{row.rank} · Score {row.total}/100 · Avg rating "
+                                        f"{_fmt(row.avg_rating, '{:.2f}')} · {row.department}"[:70])
+
+    # Rating histogram bars
+    x, y, w, h = HIST_BOX
+    top = max(histogram) or 1
+    c.setFillColor(RATING_COLOR)
+    for i, count in enumerate(histogram):
+        c.rect(x + i * w / 5 + 2, y, w / 5 - 4, count / top * (h - 8), fill=1, stroke=0)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 6)
+    for i, count in enumerate(histogram):
+        c.drawCentredString(x + (i + 0.5) * w / 5, y + count / top * (h - 8) + 1, str(count))
+
+    # Teaching curves
+    if curve is not None:
+        weeks, teacher, student = curve
+        x, y, w, h = CURVE_BOX
+        _polyline(c, x, y, w, h, weeks, teacher, TEACHER_COLOR)
+        _polyline(c, x, y, w, h, weeks, student, STUDENT_COLOR)
+
+    # Leave utilisation bar
+    x, y, w, h = LEAVE_TRACK
+    pct = row.leave_utilisation_pct
+    c.setFillColor(_leave_color(pct))
+    c.rect(x, y, w * min(pct, 100) / 100, h, fill=1, stroke=0)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 7)
+    c.drawString(x + w + 4, y + 1, f"{row.leave_used}/{row.leave_allowed} days ({pct:.0f}%)")
+    c.restoreState()
+
+def _panel_origin(slot):
+    col, row = slot % PANEL_COLS, slot // PANEL_COLS
+    x = MARGIN + col * (PANEL_WIDTH + PANEL_GAP)
+    y = PAGE_HEIGHT - MARGIN - 30 - (row + 1) * PANEL_HEIGHT - row * PANEL_GAP
+    return x, y
+
+def _teaching_curves_by_faculty(curves):
+    """{faculty_id: (weeks, teacher %, student %)} by slicing the sorted arrays, no per-person queries."""
+    ids = curves['faculty_id'].to_numpy()
+    if not len(ids):
+        return {}
+    weeks = curves['week_number'].to_numpy()
+    teacher = curves['teacher_completion_pct'].to_numpy(dtype=float)
+    student = curves['student_avg_pct'].to_numpy(dtype=float)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)]
+    return {int(ids[a]): (weeks[a:b], teacher[a:b], student[a:b]) for a, b in zip(starts, ends)}
+
+# --- ENTRY POINT ---
+def generate_department_digest(output, department=None, progress=None):
+    """
+    Writes the digest of `department` (None = all faculty) to `output`, a
+    path or binary file object. `progress` is called as progress(page, pages)
+    after each finished page. Returns run stats.
+    """
+    start = time.perf_counter()
+    overview = db.get_department_overview(department).sort_values(["rank", "faculty_id"]).reset_index(drop=True)
+    histograms = db.get_rating_histograms(department).set_index("faculty_id")
+    curves = db.get_teaching_curves(department)
+    summary = db.get_department_summary() if department is None else None
+    scope_label = department or "All Departments"
+
+    per_panel_page = PANEL_COLS * PANEL_ROWS
+    rank_pages = max(1, math.ceil(len(overview) / RANK_ROWS_PER_PAGE))
+    panel_pages = math.ceil(len(overview) / per_panel_page)
+    pages = 1 + rank_pages + panel_pages
+    page = 0
+
+    def finish_page():
+        nonlocal page
+        page += 1
+        _page_footer(c, page, pages)
+        c.showPage()
+        if progress:
+            progress(page, pages)
+
+    c = canvas.Canvas(output, pagesize=letter, pageCompression=1)
+    c.setTitle(f"Department Appraisal Digest - {scope_label}")
+    _footer_form(c, scope_label)
+    _rank_form(c)
+    _panel_form(c)
+
+    # 1. COVER
+    _draw_cover(c, scope_label, overview, curves, summary)
+    finish_page()
+
+    # 2. RANKING
+    for first in range(0, rank_pages * RANK_ROWS_PER_PAGE, RANK_ROWS_PER_PAGE):
+        _draw_ranking_page(c, overview.iloc[first:first + RANK_ROWS_PER_PAGE])
+        finish_page()
+
+    # 3. FACULTY PANELS
+    by_faculty = _teaching_curves_by_faculty(curves)
+    rating_cols = [f"rating_{star}" for star in range(1, 6)]
+    hist_rows = histograms.reindex(overview['faculty_id'])[rating_cols].fillna(0).astype(int).to_numpy()
+    panels = overview.assign(slot=np.arange(len(overview)) % per_panel_page)
+    for first in range(0, len(overview), per_panel_page):
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(MARGIN, PAGE_HEIGHT - MARGIN - 12, "Faculty Panels")
+        for i, row in enumerate(panels.iloc[first:first + per_panel_page].itertuples(index=False), start=first):
+            _draw_panel(c, row, hist_rows[i].tolist(), by_faculty.get(int(row.faculty_id)))
+        finish_page()
+
+    c.save()
+    seconds = time.perf_counter() - start
+    return {"faculty": len(overview), "pages": pages, "seconds": round(seconds, 2)}
@@ -49,9 +49,16 @@ def generate_leave_email(faculty_name, leave_type, days, status, manager_name="H
         """
         
     return body
-def generate_leave_application_email(faculty_name, leave_type, days, reason):
-    """Generates a formal leave application email from Faculty to HOD."""
+def generate_leave_application_email(faculty_name, leave_type, days, reason, faculty=None):
+    """
+    Generates a formal leave application email from Faculty to HOD.
+    `faculty` is the sender's FacultyProfile (from the FacultyDirectory), used for the signature.
+    """
     subject = f"Leave Application: {faculty_name} - {days} days ({leave_type})"
+    if faculty is not None:
+        signature = f"{faculty.designation}, {faculty.department}\nFaculty ID: {faculty.faculty_id}"
+    else:
+        signature = "Faculty ID: [Your ID]"
     
     body = f"""
 Subject: {subject}
@@ -66,6 +73,6 @@ I have applied for this leave through the EduHR-Gen Portal. I requested that you
 
 Regards,
 {faculty_name}
-Faculty ID: [Your ID]
+{signature}
     """
     return body
@@ -3,6 +3,8 @@ import sqlite3
 import os
 import random
 import shutil
+import schema_utils
+import db_utils
 
 # --- CONFIGURATION ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -46,46 +48,8 @@ if os.path.exists(DB_FILE):
 conn = sqlite3.connect(DB_FILE)
 cursor = conn.cursor()
 
-# Create Tables
-cursor.execute("""
-    CREATE TABLE faculty_master (
-        faculty_id INTEGER PRIMARY KEY, 
-        name TEXT, designation TEXT, department TEXT, joining_date TEXT
-    )
-""")
-cursor.execute("""
-    CREATE TABLE research_records (
-        research_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        faculty_id INTEGER, publications_count INTEGER, patents_count INTEGER, projects_count INTEGER,
-        FOREIGN KEY(faculty_id) REFERENCES faculty_master(faculty_id)
-    )
-""")
-cursor.execute("""
-    CREATE TABLE student_feedback (
-        feedback_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        faculty_id INTEGER, course_name TEXT, rating INTEGER, feedback_comment TEXT, sentiment_label TEXT,
-        teaching_clarity_score INTEGER, engagement_score INTEGER, pace_score INTEGER,
-        FOREIGN KEY(faculty_id) REFERENCES faculty_master(faculty_id)
-    )
-""")
-cursor.execute("""
-    CREATE TABLE leave_records (
-        leave_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        faculty_id INTEGER, type TEXT, days_requested INTEGER, status TEXT
-    )
-""")
-cursor.execute("""
-    CREATE TABLE teaching_progress (
-        record_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        faculty_id INTEGER, week_number INTEGER, teacher_completion_pct INTEGER, student_avg_pct INTEGER, class_verdict TEXT
-    )
-""")
-cursor.execute("""
-    CREATE TABLE bonus_leaves (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        faculty_id INTEGER, leave_type TEXT, extra_days INTEGER, granted_date TEXT
-    )
-""")
+# Create Tables (schema is owned by schema_utils)
+schema_utils.migrate(conn)
 
 print("✅ Created fresh table structure.")
 
@@ -148,7 +112,11 @@ for fid in faculty_ids:
         cursor.execute("INSERT INTO teaching_progress (faculty_id, week_number, teacher_completion_pct, student_avg_pct, class_verdict) VALUES (?, ?, ?, ?, ?)", 
                        (fid, week, current_progress, student_view, verdict))
 
+# Leave balances are materialized; recompute them for the freshly loaded rows
+db_utils.rebuild_leave_ledger(conn)
+
 conn.commit()
 conn.close()
+# A running app notices this commit through its data_version watcher (see db_utils)
 print("✅ SUCCESS! System reset with UNIQUE faculty list.")
 print("👉 Restart Streamlit (Ctrl+C -> streamlit run app.py).")
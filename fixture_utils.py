@@ -0,0 +1,237 @@
+import os
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+import schema_utils
+import db_utils
+
+# ==========================================
+# 🧪 CSV FIXTURES
+# ==========================================
+# Loads the project CSVs into any database connection - the in-memory
+# engine (db_utils.SQLiteMemoryEngine) used by tests and benchmarks, or a
+# fresh database file (master_import.py). Each table is prepared as a whole
+# column set with pandas and written with chunked executemany calls, all
+# inside a single transaction (see bulk_load). scale_csv_frames() grows the
+# same data N-fold for load tests.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FACULTY_CSV = "faculty_dataset_(2).csv"
+PERFORMANCE_CSV = "Performance_dataset.csv"
+FEEDBACK_CSV = "feedback_dataset.csv"
+LEAVE_CSV = "leave_dataset_.csv"
+TEACHING_CSV = "teaching_progress_dataset (1).csv"
+
+# --- ROW PREPARATION (CSV frame -> table columns) ---
+def prepare_faculty(df):
+    return df[['faculty_id', 'name', 'designation', 'department', 'date_of_joining']]
+
+def prepare_research(df):
+    # Every paper type counts as a publication; projects are not in the CSV
+    paper_cols = [c for c in ('journal_publications', 'research_papers',
+                              'conference_papers', 'scopus_indexed_papers') if c in df.columns]
+    return pd.DataFrame({
+        'faculty_id': df['faculty_id'],
+        'publications_count': df[paper_cols].sum(axis=1).astype(int),
+        'patents_count': df['patents'].astype(int) if 'patents' in df.columns else 0,
+        'projects_count': 0,
+    })
+
+def prepare_feedback(df):
+    return df[['faculty_id', 'course_name', 'rating', 'feedback_comment', 'sentiment_label',
+               'teaching_clarity_score', 'engagement_score', 'pace_score']]
+
+def prepare_leaves(df):
+    # The CSV header has a stray space: "days requested "
+    days_col = [c for c in df.columns if "days" in c.lower()][0]
+    return df[['faculty_id', 'type', days_col, 'status']]
+
+def prepare_teaching(df, faculty_ids):
+    """The teaching CSV is a single class log; every faculty member gets a copy."""
+    student_cols = [c for c in df.columns if "Est_%" in c]
+    weeks = pd.DataFrame({
+        'week_number': df['Week'],
+        'teacher_completion_pct': df['Teacher_Reported_Completion_%'],
+        'student_avg_pct': df[student_cols].mean(axis=1).astype(int),
+        'class_verdict': df['Ultimate_Class_Review'],
+    })
+    grid = pd.DataFrame({'faculty_id': list(faculty_ids)}).merge(weeks, how='cross')
+    return grid[['faculty_id', 'week_number', 'teacher_completion_pct', 'student_avg_pct', 'class_verdict']]
+
+def _rows(df):
+    # Column by column to plain Python values (sqlite3 cannot bind numpy
+    # integers); only columns with gaps pay for the NaN -> None conversion
+    return zip(*(col.astype(object).where(col.notna(), None).tolist() if col.hasnans else col.tolist()
+                 for _, col in df.items()))
+
+def _insert(cursor, table, df, chunk_rows=None):
+    columns = ", ".join(TABLE_COLUMNS[table])
+    marks = ", ".join("?" * len(TABLE_COLUMNS[table]))
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    for start in range(0, len(df), chunk_rows):
+        cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({marks})",
+                           _rows(df.iloc[start:start + chunk_rows]))
+    return len(df)
+
+TABLE_COLUMNS = {
+    "faculty_master": ("faculty_id", "name", "designation", "department", "joining_date"),
+    "research_records": ("faculty_id", "publications_count", "patents_count", "projects_count"),
+    "student_feedback": ("faculty_id", "course_name", "rating", "feedback_comment", "sentiment_label",
+                         "teaching_clarity_score", "engagement_score", "pace_score"),
+    "leave_records": ("faculty_id", "type", "days_requested", "status"),
+    "teaching_progress": ("faculty_id", "week_number", "teacher_completion_pct",
+                          "student_avg_pct", "class_verdict"),
+}
+
+# --- SYNTHETIC SCALE-UP ---
+def read_csv_frames(data_dir=BASE_DIR):
+    """The raw project CSVs as DataFrames, keyed by file."""
+    return {name: pd.read_csv(os.path.join(data_dir, name))
+            for name in (FACULTY_CSV, PERFORMANCE_CSV, FEEDBACK_CSV, LEAVE_CSV, TEACHING_CSV)}
+
+def scale_csv_frames(frames, scale, seed=0):
+    """
+    A synthetic data set `scale` times the size of the CSVs, in the same
+    shape: the faculty list is cloned under fresh IDs (copies get a numeric
+    name suffix) and performance, feedback and leave rows are resampled onto
+    those faculty. The teaching CSV is a per-class template and stays as is.
+    """
+    rng = np.random.default_rng(seed)
+    faculty = frames[FACULTY_CSV]
+    copy_no = np.repeat(np.arange(scale), len(faculty))
+    scaled = pd.concat([faculty] * scale, ignore_index=True)
+    scaled['faculty_id'] = np.arange(1, len(scaled) + 1)
+    scaled['name'] = scaled['name'].where(copy_no == 0, scaled['name'] + " " + (copy_no + 1).astype(str))
+    ids = scaled['faculty_id'].to_numpy()
+
+    def resample(df, per_faculty=False):
+        size = len(ids) if per_faculty else len(df) * scale
+        out = df.sample(size, replace=True, random_state=seed).reset_index(drop=True)
+        out['faculty_id'] = ids if per_faculty else rng.choice(ids, size)
+        return out
+
+    return {
+        FACULTY_CSV: scaled,
+        PERFORMANCE_CSV: resample(frames[PERFORMANCE_CSV], per_faculty=True),
+        FEEDBACK_CSV: resample(frames[FEEDBACK_CSV]),
+        LEAVE_CSV: resample(frames[LEAVE_CSV]),
+        TEACHING_CSV: frames[TEACHING_CSV],
+    }
+
+# --- BULK LOAD ---
+# Rows go in with executemany, CHUNK_ROWS at a time (bounding the Python
+# copy of each chunk), in one transaction. For the duration of the load the
+# connection trades durability for speed (BULK_PRAGMAS) and the secondary
+# indexes of the loaded tables are dropped, then rebuilt once over the full
+# data. Everything is restored before bulk_load returns.
+CHUNK_ROWS = 50_000
+BULK_PRAGMAS = {
+    "journal_mode": "MEMORY",   # rollback journal kept in RAM, not written to disk
+    "synchronous": "OFF",       # no fsync per commit
+    "cache_size": -256 * 1024,  # 256 MB page cache (negative = KiB)
+    "temp_store": "MEMORY",     # index builds sort in RAM
+}
+
+@contextlib.contextmanager
+def bulk_pragmas(conn):
+    """Applies BULK_PRAGMAS for the block, then puts the previous values back. Not inside a transaction."""
+    saved = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_PRAGMAS}
+    for name, value in BULK_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            conn.execute(f"PRAGMA {name}={value}")
+
+def _drop_indexes(cursor, tables):
+    """Drops the explicit indexes of `tables` and returns their CREATE statements."""
+    marks = ", ".join("?" for _ in tables)
+    indexes = cursor.execute(f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type='index' AND sql IS NOT NULL AND tbl_name IN ({marks})
+    """, list(tables)).fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+def _prepared_frames(frames, tables):
+    """{table: DataFrame of its columns} for the requested tables, in load order."""
+    faculty = prepare_faculty(frames[FACULTY_CSV])
+    preparers = {
+        "faculty_master": lambda: faculty,
+        "research_records": lambda: prepare_research(frames[PERFORMANCE_CSV]),
+        "student_feedback": lambda: prepare_feedback(frames[FEEDBACK_CSV]),
+        "leave_records": lambda: prepare_leaves(frames[LEAVE_CSV]),
+        "teaching_progress": lambda: prepare_teaching(frames[TEACHING_CSV], faculty['faculty_id']),
+    }
+    return {table: preparers[table]() for table in TABLE_COLUMNS if table in tables}
+
+def bulk_load(conn, frames, tables=tuple(TABLE_COLUMNS), chunk_rows=CHUNK_ROWS):
+    """
+    Migrates `conn` to the latest schema and fills `tables` (default: all
+    five) from CSV-shaped frames (see read_csv_frames). Expects empty tables
+    and no open transaction. Returns load stats: per table rows, seconds and
+    rows/sec, plus the time spent preparing columns, rebuilding indexes and
+    rebuilding the aggregates (feedback_stats, leave_ledger).
+    """
+    start = time.perf_counter()
+    schema_utils.migrate(conn)
+    prepared = _prepared_frames(frames, tables)
+    prepare_seconds = time.perf_counter() - start
+
+    table_stats = {}
+    with bulk_pragmas(conn):
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            index_sql = _drop_indexes(cursor, prepared)
+            # feedback_stats is rebuilt once afterwards instead of per row
+            db_utils.pause_feedback_stats(conn)
+            for table, df in prepared.items():
+                table_start = time.perf_counter()
+                rows = _insert(cursor, table, df, chunk_rows)
+                seconds = time.perf_counter() - table_start
+                table_stats[table] = {"rows": rows, "seconds": round(seconds, 4),
+                                      "rows_per_sec": round(rows / seconds) if seconds else 0}
+
+            step = time.perf_counter()
+            for sql in index_sql:
+                cursor.execute(sql)
+            index_seconds = time.perf_counter() - step
+
+            step = time.perf_counter()
+            db_utils.resume_feedback_stats(conn)
+            db_utils.rebuild_leave_ledger(conn)
+            aggregate_seconds = time.perf_counter() - step
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    db_utils.invalidate_tables(*prepared, "student_feedback", "leave_ledger")
+    return {
+        "tables": table_stats,
+        "rows": sum(t["rows"] for t in table_stats.values()),
+        "prepare_seconds": round(prepare_seconds, 3),
+        "index_seconds": round(index_seconds, 3),
+        "aggregate_seconds": round(aggregate_seconds, 3),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+# --- LOADER ---
+def load_frames(conn, frames):
+    """
+    Migrates `conn` to the latest schema and fills it from CSV-shaped frames
+    (see read_csv_frames). Expects empty tables. Returns {table: rows inserted}.
+    """
+    stats = bulk_load(conn, frames)
+    return {table: t["rows"] for table, t in stats["tables"].items()}
+
+def load_csv_fixtures(conn, data_dir=BASE_DIR, scale=1):
+    """Loads the project CSVs (or a `scale`-times synthetic copy of them) into `conn`."""
+    frames = read_csv_frames(data_dir)
+    if scale > 1:
+        frames = scale_csv_frames(frames, scale)
+    return load_frames(conn, frames)
@@ -0,0 +1,275 @@
+import os
+import socket
+import shutil
+import threading
+import time
+import traceback
+import uuid
+import contextlib
+from dataclasses import dataclass
+import db_utils as db
+import pdf_utils
+import digest_utils
+
+# ==========================================
+# ⏳ BACKGROUND JOBS
+# ==========================================
+# Slow work (department report ZIPs, digests, exports, recomputations) is
+# queued in the jobs table instead of running inside a Streamlit rerun. A
+# JobRunner claims queued jobs on worker threads, records their progress
+# and stores any file they produce under JOB_DIR/<job_id>/. Because the
+# queue is a table, queued jobs survive an app restart; running jobs whose
+# worker stops sending heartbeats are put back in the queue.
+#   submit("department_digest", owner=user_id, department="CSE") -> job ID
+#   db.get_job(job_id)                                            -> status
+
+JOB_DIR = os.environ.get("EDUHR_JOB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs"))
+JOB_WORKERS = int(os.environ.get("EDUHR_JOB_WORKERS", 2))  # 0 = no in-app workers (run job_worker.py)
+
+POLL_SECONDS = 1.0            # idle workers look for new jobs this often
+PROGRESS_INTERVAL = 0.5       # at most one progress write per job per interval
+HEARTBEAT_SECONDS = 10
+STALE_AFTER = 60              # no heartbeat for this long = the worker is gone
+MAX_ATTEMPTS = 3
+ARTIFACT_TTL = 24 * 3600      # finished files are kept this long...
+DOWNLOAD_GRACE = 15 * 60      # ...or this long after their first download
+HISTORY_TTL = 7 * 24 * 3600   # finished rows without a file are deleted after this
+
+class JobCancelled(Exception):
+    pass
+
+# --- JOB KINDS ---
+@dataclass(frozen=True, slots=True)
+class JobKind:
+    name: str
+    label: str
+    handler: object
+    tables: tuple = ()  # tables the job writes: the app refreshes its views when it finishes
+
+JOB_KINDS = {}
+
+def job_kind(name, label, tables=()):
+    """Decorator registering handler(ctx, **params) as the job kind `name`."""
+    def register(fn):
+        JOB_KINDS[name] = JobKind(name, label, fn, tables)
+        return fn
+    return register
+
+def scope_slug(department):
+    return (department or "All").replace(" ", "_")
+
+@job_kind("appraisal_report", "📄 Appraisal report")
+def _appraisal_report(ctx, faculty_id):
+    if faculty_id not in db.get_faculty_directory():
+        raise ValueError(f"No faculty member with ID {faculty_id}")
+    ctx.progress(0, 1, "Rendering report")
+    name, data = pdf_utils.generate_appraisal_pdf(faculty_id)
+    ctx.save_artifact(name, data, "application/pdf")
+    return "Report ready"
+
+@job_kind("department_reports", "📦 Appraisal reports (ZIP)")
+def _department_reports(ctx, department=None):
+    with ctx.open_artifact(f"Appraisal_Reports_{scope_slug(department)}.zip", "application/zip") as f:
+        stats = pdf_utils.generate_department_reports(f, department, progress=ctx.progress)
+    return (f"{stats['reports']} reports in {stats['seconds']}s "
+            f"({stats['cached']} cached, {stats['workers']} worker(s))")
+
+@job_kind("department_digest", "📑 Department digest")
+def _department_digest(ctx, department=None):
+    with ctx.open_artifact(f"Department_Digest_{scope_slug(department)}.pdf", "application/pdf") as f:
+        stats = digest_utils.generate_department_digest(f, department, progress=ctx.progress)
+    return f"{stats['pages']} pages, {stats['faculty']} faculty"
+
+@job_kind("overview_export", "📊 Department overview (CSV)")
+def _overview_export(ctx, department=None):
+    ctx.progress(0, 1, "Exporting")
+    overview = db.get_department_overview(department)
+    ctx.save_artifact(f"Department_Overview_{scope_slug(department)}.csv",
+                      overview.to_csv(index=False).encode(), "text/csv")
+    return f"{len(overview)} rows"
+
+@job_kind("sync_profile", "🔄 Sync missing data",
+          tables=("research_records", "student_feedback", "leave_ledger"))
+def _sync_profile(ctx, faculty_id):
+    added = db.sync_faculty_profile(faculty_id)
+    return f"Added {', '.join(added)}" if added else "Nothing was missing"
+
+@job_kind("rebuild_aggregates", "🧮 Rebuild aggregates", tables=("student_feedback", "leave_ledger"))
+def _rebuild_aggregates(ctx):
+    ctx.progress(0, 2, "Rebuilding feedback stats")
+    db.rebuild_feedback_stats()
+    ctx.progress(1, 2, "Rebuilding leave ledger")
+    rows = db.rebuild_leave_ledger()
+    return f"Feedback stats and {rows} ledger rows rebuilt"
+
+# --- QUEUEING ---
+_new_work = threading.Event()
+
+def submit(kind, owner=None, **params):
+    """Queues a job of a registered kind and returns its ID (the existing one if it is already queued)."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+    job_id = db.enqueue_job(kind, params, None if owner is None else str(owner))
+    _new_work.set()  # wake idle workers in this process
+    return job_id
+
+def artifact_path(job):
+    """Where a finished job's file is stored (None if it produced none)."""
+    if not job.artifact_name:
+        return None
+    return os.path.join(JOB_DIR, str(job.job_id), job.artifact_name)
+
+def read_artifact(job):
+    """The bytes of a finished job's file, or None once it is gone."""
+    path = artifact_path(job)
+    if path is None or job.status != "done":
+        return None
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def mark_downloaded(job_id):
+    db.mark_job_downloaded(job_id, DOWNLOAD_GRACE)
+
+def _remove_artifacts(job_id):
+    shutil.rmtree(os.path.join(JOB_DIR, str(job_id)), ignore_errors=True)
+
+# --- RUNNING ---
+class JobContext:
+    """What a handler gets: throttled progress reporting and a place for its output file."""
+
+    def __init__(self, job):
+        self.job = job
+        self.artifact = None  # (name, mime, size) once written
+        self._last_write = 0.0
+
+    def progress(self, done, total, message=None):
+        now = time.monotonic()
+        if done < total and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        if not db.update_job_progress(self.job.job_id, done, total, message):
+            raise JobCancelled()
+
+    @contextlib.contextmanager
+    def open_artifact(self, name, mime):
+        """Binary file for the job's output; it only appears under its name once the block succeeds."""
+        directory = os.path.join(JOB_DIR, str(self.job.job_id))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                yield f
+            os.replace(tmp_path, path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+        self.artifact = (name, mime, os.path.getsize(path))
+
+    def save_artifact(self, name, data, mime):
+        with self.open_artifact(name, mime) as f:
+            f.write(data)
+
+def run_job(job):
+    """Runs one claimed job to completion and records the outcome."""
+    kind = JOB_KINDS.get(job.kind)
+    ctx = JobContext(job)
+    try:
+        if kind is None:
+            raise ValueError(f"Unknown job kind: {job.kind!r}")
+        message = kind.handler(ctx, **job.params)
+    except JobCancelled:
+        _remove_artifacts(job.job_id)
+        return
+    except Exception as e:
+        traceback.print_exc()
+        _remove_artifacts(job.job_id)
+        db.fail_job(job.job_id, f"{type(e).__name__}: {e}")
+        return
+    name, mime, size = ctx.artifact or (None, None, None)
+    if not db.finish_job(job.job_id, message, name, mime, size, keep_for=ARTIFACT_TTL if name else None):
+        _remove_artifacts(job.job_id)  # cancelled while finishing
+
+class JobRunner:
+    """
+    `workers` threads that claim and run queued jobs, plus one housekeeping
+    thread that sends heartbeats, requeues jobs of stopped workers and
+    deletes expired artifacts.
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.housekeeping()
+        for n in range(self.workers):
+            self._spawn(self._work_loop, f"job-worker-{n}")
+        self._spawn(self._housekeeping_loop, "job-housekeeping")
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        _new_work.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @property
+    def alive(self):
+        return any(t.is_alive() for t in self._threads) and not self._stop.is_set()
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def run_next(self):
+        """Claims and runs one queued job. Returns False if the queue was empty."""
+        job = db.claim_next_job(self.worker_id)
+        if job is None:
+            return False
+        run_job(job)
+        return True
+
+    def housekeeping(self):
+        db.heartbeat_jobs(self.worker_id)
+        requeued, failed = db.requeue_stale_jobs(STALE_AFTER, MAX_ATTEMPTS)
+        if requeued:
+            _new_work.set()
+        for job_id in db.expire_jobs():
+            _remove_artifacts(job_id)
+        db.purge_job_history(HISTORY_TTL)
+        return requeued, failed
+
+    def _work_loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_next():
+                    continue
+            except Exception:
+                traceback.print_exc()  # e.g. the database is locked; try again later
+            _new_work.wait(POLL_SECONDS)
+            _new_work.clear()
+
+    def _housekeeping_loop(self):
+        while not self._stop.wait(HEARTBEAT_SECONDS):
+            try:
+                self.housekeeping()
+            except Exception:
+                traceback.print_exc()
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def start_runner(workers=JOB_WORKERS):
+    """The process-wide JobRunner, started on first call (no worker threads if workers=0)."""
+    global _runner
+    with _runner_lock:
+        if _runner is None or not _runner.alive:
+            _runner = JobRunner(workers).start()
+        return _runner
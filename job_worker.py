@@ -0,0 +1,53 @@
+import argparse
+import sys
+import time
+import db_utils as db
+import job_utils
+import schema_utils
+
+# Runs background jobs outside the Streamlit process (start the app with
+# EDUHR_JOB_WORKERS=0 to leave all jobs to this worker).
+#   python job_worker.py               -> run jobs until Ctrl+C
+#   python job_worker.py --drain       -> run every queued job, then exit
+#   python job_worker.py --list        -> show the most recent jobs
+#   python job_worker.py --workers 4
+
+if __name__ == "__main__":
+    # Report jobs start worker processes that re-import this module
+    parser = argparse.ArgumentParser(description="Background job worker")
+    parser.add_argument("--workers", type=int, default=job_utils.JOB_WORKERS, help="worker threads")
+    parser.add_argument("--drain", action="store_true", help="run the queued jobs one by one, then exit")
+    parser.add_argument("--list", action="store_true", help="list recent jobs and exit")
+    args = parser.parse_args()
+
+    conn = db.get_connection()
+    schema_utils.migrate(conn)
+    conn.close()
+
+    if args.list:
+        counts = db.get_job_counts()
+        print("⏳ JOBS: " + (", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "none"))
+        for job in db.list_jobs(limit=20):
+            print(f"   #{job.job_id:<5} {job.kind:<20} {job.status:<10} {job.progress}/{job.total:<6} "
+                  f"{job.created_at}  {job.message or ''}")
+        sys.exit(0)
+
+    if args.drain:
+        # No worker threads: jobs run here, the housekeeping thread keeps their heartbeat
+        runner = job_utils.JobRunner(workers=0).start()
+        done = 0
+        started = time.perf_counter()
+        while runner.run_next():
+            done += 1
+        runner.stop()
+        print(f"✅ Ran {done} job(s) in {time.perf_counter() - started:.1f}s")
+        sys.exit(0)
+
+    runner = job_utils.JobRunner(args.workers).start()
+    print(f"⏳ JOB WORKER {runner.worker_id}: {args.workers} thread(s), artifacts in {job_utils.JOB_DIR}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping (running jobs finish first)...")
+        runner.stop()
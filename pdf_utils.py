@@ -1,26 +1,141 @@
+import reportlab
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfdoc
 from reportlab.lib import colors
 from reportlab.platypus import Table, TableStyle
 import db_utils as db
 import os
+import io
+import json
+import time
+import hashlib
+import contextlib
+import multiprocessing
+import threading
+import zipfile
 import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
 from datetime import datetime
 
-def generate_appraisal_pdf(faculty_id):
+# Bump whenever the report layout or fields change: cached
+# reports from an older template are purged on first use
+TEMPLATE_VERSION = 3
+
+def report_filename(profile):
+    # Clean filename (remove spaces)
+    clean_name = profile.name.replace(' ', '_')
+    return f"Appraisal_Report_{profile.faculty_id}_{clean_name}.pdf"
+
+def generate_appraisal_pdf(faculty_id, output=None):
+    # Renders into memory, or into `output` (any writable binary stream)
+    # when given - never into the working directory. Returns the suggested
+    # file name and the PDF bytes (None when written to `output`).
     # 1. FETCH ALL DATA
-    # We use .iloc[0] to get the single row as a Series
-    profile = db.get_faculty_profile(faculty_id).iloc[0]
+    # Point lookup in the shared FacultyDirectory, no query needed
+    profile = db.get_faculty_directory().get(faculty_id)
     appraisal = db.calculate_appraisal_score(faculty_id)
     
-    # 2. SETUP PDF FILE
-    # Clean filename (remove spaces)
-    clean_name = profile['name'].replace(' ', '_')
-    filename = f"Appraisal_Report_{faculty_id}_{clean_name}.pdf"
-    
-    c = canvas.Canvas(filename, pagesize=letter)
+    # 2. RENDER (or reuse the cached report for the same inputs)
+    data = report_cache.render(profile, appraisal)
+    if output is None:
+        return report_filename(profile), data
+    output.write(data)
+    return report_filename(profile), None
+
+def render_appraisal_pdf(profile, appraisal, output=None, precompiled=True):
+    """
+    Draws the report for already-fetched data into `output`, or returns it
+    as bytes. The static layout comes from the precompiled template; with
+    precompiled=False it is drawn from scratch (same result, slower).
+    """
+    if output is None:
+        buffer = io.BytesIO()
+        render_appraisal_pdf(profile, appraisal, buffer, precompiled)
+        return buffer.getvalue()
+
+    if precompiled:
+        stream, slots = _compiled_layout()
+        c = canvas.Canvas(output, pagesize=letter)
+        _register_fonts(c)
+        # An explicit /Filter tells reportlab the content is already encoded
+        contents = pdfdoc.PDFStream(pdfdoc.PDFDictionary({"Filter": pdfdoc.PDFArray([pdfdoc.PDFName("FlateDecode")])}),
+                                    stream)
+        c.beginForm(LAYOUT_FORM)
+        c.endForm(Contents=contents)
+        c.doForm(LAYOUT_FORM)
+    else:
+        c = _LayoutCanvas(output, pagesize=letter)
+        _register_fonts(c)
+        _draw_layout(c)
+        slots = c.slots
+
+    _draw_fields(c, profile, appraisal, slots)
+    c.save()
+
+# ==========================================
+# 🧩 REPORT TEMPLATE (static layout, drawn once)
+# ==========================================
+# Everything that is identical on every report - titles, rules, the table
+# grid and labels, the signature box - is drawn once per process and kept
+# as a compressed PDF content stream. Each report embeds that stream as a
+# form XObject (no drawing calls, no re-encoding) and stamps only its own
+# fields on top of it.
+
+LAYOUT_FORM = "AppraisalLayout"
+# Registered first and in this order on every canvas, so the font names
+# inside the precompiled operators (/F1, /F2, ...) match in each document
+TEMPLATE_FONTS = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Courier")
+# Lower-left corner of the breakdown table; cell positions are relative to it
+TABLE_ORIGIN = (55, letter[1] - 405)
+# Breakdown table rows: metric, weightage, key of the points in the breakdown
+BREAKDOWN_ROWS = (
+    ("Student Feedback", "50%", "Feedback (50%)"),
+    ("Research & Publications", "30%", "Research (30%)"),
+    ("Attendance & Discipline", "20%", "Attendance (20%)"),
+)
+
+class _LayoutCanvas(canvas.Canvas):
+    """Canvas that records where the table puts the points column (in table coordinates) instead of drawing it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slots = {}
+
+    def drawCentredString(self, x, y, text, *args, **kwargs):
+        if text in (key for _, _, key in BREAKDOWN_ROWS):
+            self.slots[text] = (x, y)
+            return
+        super().drawCentredString(x, y, text, *args, **kwargs)
+
+def _register_fonts(c):
+    for font in TEMPLATE_FONTS:
+        c.setFont(font, 10)
+
+_layout = None
+
+def _compiled_layout():
+    """(Flate-compressed content stream of the static layout, {breakdown key: (x, y)}), built on first use."""
+    global _layout
+    if _layout is None:
+        c = _LayoutCanvas(io.BytesIO(), pagesize=letter)
+        _register_fonts(c)
+        # Not public API (hence the pin in requirements.txt): fail loudly if it moves
+        if not isinstance(getattr(c, "_code", None), list) or not isinstance(getattr(c, "_preamble", None), str):
+            raise RuntimeError(f"reportlab {reportlab.Version}: Canvas._code/_preamble changed, "
+                               "the precompiled report template needs the version pinned in requirements.txt")
+        start = len(c._code)
+        _draw_layout(c)
+        # The same operator list endForm() would turn into the form's stream
+        ops = [c._preamble] + c._code[start:]
+        _layout = (pdfdoc.PDFZCompress.encode("\n".join(ops)), c.slots)
+    return _layout
+
+def _draw_layout(c):
     width, height = letter
-    
+
     # --- HEADER ---
     c.setFont("Helvetica-Bold", 20)
     c.drawString(50, height - 50, "Annual Performance Appraisal Report")
@@ -29,30 +144,60 @@ def generate_appraisal_pdf(faculty_id):
     c.drawString(50, height - 65, "Confidential HR Document")
     c.line(50, height - 75, width - 50, height - 75)
     
-    # --- SECTION 1: FACULTY DETAILS ---
-    y_pos = height - 120
+    # --- SECTION TITLES ---
     c.setFont("Helvetica-Bold", 14)
     c.setFillColor(colors.darkblue)
-    c.drawString(50, y_pos, "1. Faculty Profile")
+    c.drawString(50, height - 120, "1. Faculty Profile")
+    c.drawString(50, height - 225, "2. Performance Scorecard")
+    c.drawString(50, height - 455, "3. Official Recommendation")
     c.setFillColor(colors.black)
     
-    c.setFont("Helvetica", 12)
-    y_pos -= 25
-    c.drawString(50, y_pos, f"Name: {profile['name']}")
-    c.drawString(350, y_pos, f"Employee ID: {profile['faculty_id']}")
+    # Breakdown Table (the points column is stamped per report)
+    data = [["Performance Metric", "Weightage", "Points Earned"]] + \
+           [[metric, weight, key] for metric, weight, key in BREAKDOWN_ROWS]
     
-    y_pos -= 20
-    c.drawString(50, y_pos, f"Department: {profile['department']}")
-    c.drawString(350, y_pos, f"Designation: {profile['designation']}")
+    table = Table(data, colWidths=[250, 100, 150])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('ALIGN', (0,0), (0,-1), 'LEFT'), # Left align first column
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0,0), (-1,0), 12),
+        ('GRID', (0,0), (-1,-1), 1, colors.black)
+    ]))
     
-    # --- SECTION 2: PERFORMANCE SCORECARD ---
-    y_pos -= 60
-    c.setFont("Helvetica-Bold", 14)
+    table.wrapOn(c, width, height)
+    table.drawOn(c, *TABLE_ORIGIN)
+    
+    # --- AUTOMATIC DIGITAL SIGNATURE ---
+    # Draw a "Digital Stamp" box
+    c.setStrokeColor(colors.darkblue)
+    c.setFillColor(colors.aliceblue) # Very light blue background
+    c.roundRect(350, height - 635, 200, 70, 10, fill=1, stroke=1)
+    
+    # Stamp Text
     c.setFillColor(colors.darkblue)
-    c.drawString(50, y_pos, "2. Performance Scorecard")
+    c.setFont("Helvetica-Bold", 10)
+    c.drawCentredString(450, height - 585, "DIGITALLY VERIFIED")
+    
     c.setFillColor(colors.black)
+    c.setFont("Helvetica", 9)
+    c.drawCentredString(450, height - 600, "Academic HR Administration")
+    c.setFont("Courier", 8)
+    c.drawCentredString(450, height - 630, "ID: SYS-AUTO-GEN")
+
+def _draw_fields(c, profile, appraisal, slots):
+    width, height = letter
+
+    # --- SECTION 1: FACULTY DETAILS ---
+    c.setFont("Helvetica", 12)
+    c.drawString(50, height - 145, f"Name: {profile.name}")
+    c.drawString(350, height - 145, f"Employee ID: {profile.faculty_id}")
+    c.drawString(50, height - 165, f"Department: {profile.department}")
+    c.drawString(350, height - 165, f"Designation: {profile.designation}")
     
-    # Draw Score Box
+    # --- SECTION 2: PERFORMANCE SCORECARD ---
     score = appraisal['total']
     breakdown = appraisal['breakdown']
     
@@ -60,90 +205,278 @@ def generate_appraisal_pdf(faculty_id):
     if score >= 80: 
         bg_color = colors.green
         verdict_text = "OUTSTANDING"
+        rec_detail = "Eligible for Promotion and Performance Bonus."
     elif score >= 60: 
         bg_color = colors.orange
         verdict_text = "MEETS EXPECTATIONS"
+        rec_detail = "Continue with current responsibilities. Annual increment approved."
     else: 
         bg_color = colors.red
         verdict_text = "NEEDS IMPROVEMENT"
+        rec_detail = "Performance Improvement Plan (PIP) required. Promotion holds."
     
     # Draw the colored banner
     c.setFillColor(bg_color)
-    c.rect(50, y_pos - 80, 510, 60, fill=1, stroke=0) 
+    c.rect(50, height - 305, 510, 60, fill=1, stroke=0) 
     
     c.setFillColor(colors.white)
     c.setFont("Helvetica-Bold", 24)
     # Center the text
-    c.drawCentredString(width/2, y_pos - 65, f"FINAL SCORE: {score}/100")
+    c.drawCentredString(width/2, height - 290, f"FINAL SCORE: {score}/100")
     
     # Reset Color
     c.setFillColor(colors.black)
     
-    # Breakdown Table
-    data = [
-        ["Performance Metric", "Weightage", "Points Earned"],
-        ["Student Feedback", "50%", f"{breakdown['Feedback (50%)']}"],
-        ["Research & Publications", "30%", f"{breakdown['Research (30%)']}"],
-        ["Attendance & Discipline", "20%", f"{breakdown['Attendance (20%)']}"]
-    ]
-    
-    table = Table(data, colWidths=[250, 100, 150])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('ALIGN', (0,0), (0,-1), 'LEFT'), # Left align first column
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0,0), (-1,0), 12),
-        ('GRID', (0,0), (-1,-1), 1, colors.black)
-    ]))
-    
-    table.wrapOn(c, width, height)
-    table.drawOn(c, 55, y_pos - 180)
+    # Points column of the breakdown table, at the cell positions of the template
+    c.setFont("Helvetica", 10)
+    for _, _, key in BREAKDOWN_ROWS:
+        x, y = slots[key]
+        c.drawCentredString(TABLE_ORIGIN[0] + x, TABLE_ORIGIN[1] + y, f"{breakdown[key]}")
     
     # --- SECTION 3: HR RECOMMENDATION ---
-    y_pos -= 230
-    c.setFont("Helvetica-Bold", 14)
-    c.setFillColor(colors.darkblue)
-    c.drawString(50, y_pos, "3. Official Recommendation")
-    c.setFillColor(colors.black)
-    
     c.setFont("Helvetica", 12)
-    y_pos -= 30
-    
-    if score >= 80:
-        rec_detail = "Eligible for Promotion and Performance Bonus."
-    elif score >= 60:
-        rec_detail = "Continue with current responsibilities. Annual increment approved."
-    else:
-        rec_detail = "Performance Improvement Plan (PIP) required. Promotion holds."
-        
-    c.drawString(50, y_pos, f"Official Verdict: {verdict_text}")
+    c.drawString(50, height - 485, f"Official Verdict: {verdict_text}")
     c.setFont("Helvetica-Oblique", 11)
-    c.drawString(50, y_pos - 20, f"Action: {rec_detail}")
-    
-    # --- AUTOMATIC DIGITAL SIGNATURE (NEW!) ---
-    y_pos -= 100
+    c.drawString(50, height - 505, f"Action: {rec_detail}")
     
-    # Draw a "Digital Stamp" box
-    c.setStrokeColor(colors.darkblue)
-    c.setFillColor(colors.aliceblue) # Very light blue background
-    c.roundRect(350, y_pos - 50, 200, 70, 10, fill=1, stroke=1)
-    
-    # Stamp Text
-    c.setFillColor(colors.darkblue)
-    c.setFont("Helvetica-Bold", 10)
-    c.drawCentredString(450, y_pos, "DIGITALLY VERIFIED")
-    
-    c.setFillColor(colors.black)
-    c.setFont("Helvetica", 9)
-    c.drawCentredString(450, y_pos - 15, "Academic HR Administration")
-    
-    # Dynamic Timestamp
+    # Dynamic Timestamp (inside the signature box)
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     c.setFont("Courier", 8)
-    c.drawCentredString(450, y_pos - 35, f"Signed: {timestamp}")
-    c.drawCentredString(450, y_pos - 45, "ID: SYS-AUTO-GEN")
+    c.drawCentredString(450, height - 620, f"Signed: {timestamp}")
 
-    c.save()
-    return filename
+# ==========================================
+# 🗄️ REPORT CACHE (content-addressed, on disk)
+# ==========================================
+# A report is fully determined by the profile row, the score breakdown and
+# the template, so its bytes are stored under a hash of exactly those. Any
+# edit to the inputs gives a new key; stale entries simply age out of the
+# size-bounded LRU. A hit never touches reportlab (the embedded "Signed"
+# timestamp is the time the report was first drawn).
+
+REPORT_CACHE_DIR = os.environ.get("EDUHR_REPORT_CACHE",
+                                  os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "reports"))
+REPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Other processes (job_worker.py, batch_reports.py) add and evict files in the
+# same folder. A writer rescans it before enforcing the bound whenever the
+# folder changed since its own last write, and at least this often anyway.
+REPORT_CACHE_RESCAN_SECONDS = 30
+
+def report_key(profile, appraisal):
+    """SHA-256 of everything the report is drawn from."""
+    payload = json.dumps({"template": TEMPLATE_VERSION, "profile": asdict(profile), "appraisal": appraisal},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ReportCache:
+    """
+    Rendered PDFs as <key>.pdf files in `directory`, evicted least recently
+    used first once they exceed `max_bytes`. Recency is the file mtime, so
+    it survives restarts and is shared by processes using the same folder.
+    The bound covers the whole folder: before evicting, a writer rescans it if
+    the folder's mtime moved since its own last write (another process added
+    or evicted files), so their files count and the ones they evicted drop out.
+    """
+
+    def __init__(self, directory=REPORT_CACHE_DIR, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None  # key -> size, oldest first; loaded on first use
+        self._bytes = 0
+        self._scanned = 0.0
+        self._dir_mtime = None  # folder mtime after this process's last change
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _load(self):
+        # Caller holds the lock
+        if self._index is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        marker = os.path.join(self.directory, "TEMPLATE")
+        try:
+            with open(marker) as f:
+                current = f.read().strip() == str(TEMPLATE_VERSION)
+        except FileNotFoundError:
+            current = False
+        if not current:
+            self._remove_all()
+            with open(marker, "w") as f:
+                f.write(str(TEMPLATE_VERSION))
+        self._scan()
+        self._dir_mtime = os.stat(self.directory).st_mtime_ns
+
+    def _scan(self):
+        # Caller holds the lock. Rebuilds the index from the folder, oldest first.
+        entries = []
+        for e in os.scandir(self.directory):
+            if e.name.endswith(".pdf"):
+                with contextlib.suppress(FileNotFoundError):  # evicted by another process meanwhile
+                    st = e.stat()
+                    entries.append((st.st_mtime, e.name[:-4], st.st_size))
+        self._index = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._bytes = sum(self._index.values())
+        self._scanned = time.monotonic()
+
+    def _remove_all(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".pdf", ".tmp")):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(entry.path)
+
+    def get(self, key):
+        """Cached PDF bytes, or None."""
+        with self._lock:
+            self._load()
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                # Gone (or never there): evicted by another process
+                self._bytes -= self._index.pop(key, 0)
+                self._stats["misses"] += 1
+                return None
+            os.utime(self._path(key))
+            if key not in self._index:
+                self._index[key] = len(data)
+                self._bytes += len(data)
+            self._index.move_to_end(key)
+            self._stats["hits"] += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._load()
+            changed_elsewhere = os.stat(self.directory).st_mtime_ns != self._dir_mtime
+            # Write-then-rename, so readers never see half a file
+            tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+            self._bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            if (changed_elsewhere or self._bytes > self.max_bytes
+                    or time.monotonic() - self._scanned > REPORT_CACHE_RESCAN_SECONDS):
+                self._scan()
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                old_key, size = self._index.popitem(last=False)
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._path(old_key))
+                self._bytes -= size
+                self._stats["evictions"] += 1
+            self._dir_mtime = os.stat(self.directory).st_mtime_ns
+
+    def render(self, profile, appraisal):
+        """The report as bytes, drawn only on a cache miss."""
+        key = report_key(profile, appraisal)
+        data = self.get(key)
+        if data is None:
+            data = render_appraisal_pdf(profile, appraisal)
+            self.put(key, data)
+        return data
+
+    def purge(self):
+        """Deletes every cached report (e.g. after a template change). Returns how many."""
+        with self._lock:
+            self._load()
+            count = len(self._index)
+            self._remove_all()
+            self._index.clear()
+            self._bytes = 0
+            return count
+
+    def stats(self):
+        """Hit/miss counters of this process plus the current size of the cache."""
+        with self._lock:
+            self._load()
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+report_cache = ReportCache()
+
+# ==========================================
+# 📦 BATCH REPORTS (whole department)
+# ==========================================
+# All profiles and scores are fetched up front in the parent process (one
+# directory load plus the grouped bulk scorer), so workers only draw PDFs
+# and never touch the database. Reports already in the report cache are
+# copied straight into the ZIP; only the misses go to the process pool.
+
+# Below this many reports a process pool costs more than it saves
+MIN_PARALLEL_REPORTS = 8
+# Workers are started fresh rather than forked: batches run on job worker
+# threads, and a fork would copy locks other threads hold at that moment
+# (the connection pool, the query cache) into children that never release them
+_POOL_CONTEXT = multiprocessing.get_context("spawn")
+
+def _render_report(job):
+    """Worker: (profile, appraisal) -> PDF bytes."""
+    profile, appraisal = job
+    return render_appraisal_pdf(profile, appraisal)
+
+def generate_department_reports(output, department=None, workers=None, progress=None):
+    """
+    Writes every appraisal report of `department` (None = all faculty) into
+    a ZIP archive; `output` is a path or binary file object. `progress` is
+    called as progress(done, total) after each report. Returns run stats.
+    """
+    start = time.perf_counter()
+    directory = db.get_faculty_directory()
+    scores = db.get_appraisals_bulk(department)
+    jobs = [(directory.get(fid), db.appraisal_breakdown(scores[fid]))
+            for fid in sorted(scores) if fid in directory]
+    total = len(jobs)
+    done = 0
+
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        def add(profile, data):
+            nonlocal done
+            archive.writestr(report_filename(profile), data)
+            done += 1
+            if progress:
+                progress(done, total)
+
+        misses = []
+        for job in jobs:
+            key = report_key(*job)
+            data = report_cache.get(key)
+            if data is None:
+                misses.append((job, key))
+            else:
+                add(job[0], data)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if len(misses) < MIN_PARALLEL_REPORTS:
+            workers = 1
+        pending = [job for job, _ in misses]
+        if workers == 1:
+            rendered = map(_render_report, pending)
+            _store_reports(misses, rendered, add)
+        else:
+            # A few chunks per worker keeps the pool busy without per-report IPC
+            chunksize = max(1, len(pending) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT) as pool:
+                rendered = pool.map(_render_report, pending, chunksize=chunksize)
+                _store_reports(misses, rendered, add)
+
+    seconds = time.perf_counter() - start
+    return {
+        "reports": total,
+        "cached": total - len(misses),
+        "workers": workers,
+        "seconds": round(seconds, 2),
+        "reports_per_sec": round(total / seconds, 1) if seconds else 0.0,
+    }
+
+def _store_reports(misses, rendered, add):
+    for ((profile, _), key), data in zip(misses, rendered):
+        report_cache.put(key, data)
+        add(profile, data)
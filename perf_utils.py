@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import uuid
+import logging
+import contextlib
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+import db_utils as db
+
+# ==========================================
+# ⏱️ PAGE INSTRUMENTATION
+# ==========================================
+# A RunProfile times the named sections of one script run (a full page
+# run or a single fragment rerun). For each section it also records the
+# SQL statements issued and the rows fetched through db_utils connections.
+# Finished runs are written as one JSON object per line to PERF_LOG_FILE
+# (rotated at PERF_LOG_MAX_BYTES), so slow reruns can be analysed later.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PERF_LOG_FILE = os.environ.get("EDUHR_PERF_LOG", os.path.join(BASE_DIR, "logs", "perf.jsonl"))
+PERF_LOG_MAX_BYTES = 5 * 1024 * 1024
+PERF_LOG_BACKUPS = 3
+
+@dataclass(slots=True)
+class SectionTiming:
+    name: str
+    ms: float
+    statements: int
+    rows: int
+    depth: int
+
+class RunProfile:
+    def __init__(self, kind, **context):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.context = context
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.sections = []
+        self.finished = False
+        self._start = time.perf_counter()
+        self._path = []
+        self.total_ms = 0.0
+
+    @contextlib.contextmanager
+    def section(self, name):
+        """Times the block; nested sections are named "outer › inner"."""
+        self._path.append(name)
+        full_name = " › ".join(self._path)
+        # Reserve the slot now, so sections stay in start order
+        index = len(self.sections)
+        self.sections.append(None)
+        start = time.perf_counter()
+        with db.track_queries() as stats:
+            try:
+                yield
+            finally:
+                self._path.pop()
+                self.sections[index] = SectionTiming(
+                    full_name, round((time.perf_counter() - start) * 1000, 2),
+                    stats.statements, stats.rows, depth=len(self._path))
+
+    def finish(self):
+        """Stops the clock and writes the run to the log file (once)."""
+        if self.finished:
+            return
+        self.finished = True
+        self.total_ms = round((time.perf_counter() - self._start) * 1000, 2)
+        _get_logger().info(json.dumps(self.as_record()))
+
+    def as_record(self):
+        return {
+            "run_id": self.run_id,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "total_ms": self.total_ms,
+            **self.context,
+            "sections": [asdict(s) for s in self.sections if s is not None],
+        }
+
+_logger = None
+
+def _get_logger():
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("eduhr.perf")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            os.makedirs(os.path.dirname(PERF_LOG_FILE), exist_ok=True)
+            handler = RotatingFileHandler(PERF_LOG_FILE, maxBytes=PERF_LOG_MAX_BYTES,
+                                          backupCount=PERF_LOG_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+def read_recent_runs(limit=50):
+    """The last `limit` runs from the current log file, newest first."""
+    try:
+        with open(PERF_LOG_FILE, encoding="utf-8") as f:
+            lines = f.readlines()[-limit:]
+    except FileNotFoundError:
+        return []
+    return [json.loads(line) for line in reversed(lines) if line.strip()]
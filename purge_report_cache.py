@@ -0,0 +1,20 @@
+import sys
+import pdf_utils
+
+# Usage:
+#   python purge_report_cache.py          -> delete every cached appraisal report
+#   python purge_report_cache.py --stats  -> show the cache size only
+# Reports from an older TEMPLATE_VERSION are purged automatically; run this
+# after changing the report layout without bumping the version.
+
+cache = pdf_utils.report_cache
+stats = cache.stats()
+print(f"🗄️  REPORT CACHE: {cache.directory}")
+print(f"   {stats['entries']} reports, {stats['bytes'] / 1024:.0f} KB "
+      f"(limit {cache.max_bytes / 1024 / 1024:.0f} MB, template v{pdf_utils.TEMPLATE_VERSION})")
+
+if "--stats" in sys.argv:
+    sys.exit(0)
+
+count = cache.purge()
+print(f"✅ Purged {count} cached reports.")
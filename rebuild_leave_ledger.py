@@ -0,0 +1,27 @@
+import sys
+import db_utils as db
+import schema_utils
+
+# Usage:
+#   python rebuild_leave_ledger.py          -> verify, then rebuild if it drifted
+#   python rebuild_leave_ledger.py --check  -> verify only (exit code 1 on drift)
+
+conn = db.get_connection()
+schema_utils.migrate(conn)
+conn.close()
+
+print("🔍 VERIFYING LEAVE LEDGER...")
+drift = db.verify_leave_ledger()
+
+if drift.empty:
+    print("✅ Ledger matches leave_records and bonus_leaves.")
+    sys.exit(0)
+
+print(f"⚠️  {len(drift)} ledger rows are out of date:")
+print(drift.to_string(index=False))
+
+if "--check" in sys.argv:
+    sys.exit(1)
+
+count = db.rebuild_leave_ledger()
+print(f"✅ Rebuilt {count} ledger rows.")
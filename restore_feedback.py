@@ -2,6 +2,8 @@ import sqlite3
 import pandas as pd
 import os
 import random
+import schema_utils
+import db_utils
 
 # --- SETUP ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -9,10 +11,16 @@ DB_FILE = os.path.join(BASE_DIR, "academic_hr.db")
 FEEDBACK_CSV = os.path.join(BASE_DIR, "feedback_dataset.csv")
 
 conn = sqlite3.connect(DB_FILE)
+schema_utils.migrate(conn)
 cursor = conn.cursor()
 
 print("🚀 GENERATING 50 REVIEWS PER FACULTY...")
 
+# Bulk load: feedback_stats is rebuilt once at the end instead of per row.
+# One transaction from here to the commit, so a failure also rolls back the dropped triggers.
+conn.execute("BEGIN IMMEDIATE")
+db_utils.pause_feedback_stats(conn)
+
 # 1. Clear Old Data
 cursor.execute("DELETE FROM student_feedback")
 print("🧹 Cleared old feedback data.")
@@ -92,6 +100,8 @@ for fid in db_ids:
         ))
     gen_count += 1
 
+db_utils.resume_feedback_stats(conn)
 conn.commit()
 conn.close()
+# A running app notices this commit through its data_version watcher (see db_utils)
 print(f"✅ Generated 50 reviews each for {gen_count} faculty members.")
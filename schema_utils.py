@@ -0,0 +1,227 @@
+from datetime import datetime
+
+# ==========================================
+# 🗂️ SCHEMA MIGRATIONS
+# ==========================================
+# This module owns the database schema. Every change to the tables or
+# indexes is a new numbered step appended to MIGRATIONS; steps that
+# already ran (recorded in `schema_version`) are never applied twice.
+# Never edit a step that has shipped - add a new one instead.
+# A step is either a SQL string or a callable taking the connection; a
+# callable returns the tables whose cached reads go stale once it commits.
+
+# The data-filling steps live in db_utils, imported lazily to avoid a cycle.
+def _build_leave_ledger(conn):
+    import db_utils
+    db_utils.rebuild_leave_ledger(conn)
+    return ("leave_ledger",)
+
+def _build_feedback_stats(conn):
+    import db_utils
+    db_utils.rebuild_feedback_stats(conn)
+    return ("student_feedback",)
+
+# feedback_stats is kept in step with student_feedback by these triggers.
+# The histogram/sentiment columns add 1 when the row matches (`IS` never yields NULL).
+_FEEDBACK_DELTA = """
+    UPDATE feedback_stats SET
+        review_count = review_count + {sign},
+        rated_count = rated_count + {sign} * ({row}.rating IS NOT NULL),
+        rating_sum = rating_sum + {sign} * IFNULL({row}.rating, 0),
+        rating_1 = rating_1 + {sign} * ({row}.rating IS 1),
+        rating_2 = rating_2 + {sign} * ({row}.rating IS 2),
+        rating_3 = rating_3 + {sign} * ({row}.rating IS 3),
+        rating_4 = rating_4 + {sign} * ({row}.rating IS 4),
+        rating_5 = rating_5 + {sign} * ({row}.rating IS 5),
+        positive_count = positive_count + {sign} * ({row}.sentiment_label IS 'Positive'),
+        neutral_count = neutral_count + {sign} * ({row}.sentiment_label IS 'Neutral'),
+        negative_count = negative_count + {sign} * ({row}.sentiment_label IS 'Negative')
+    WHERE faculty_id = {row}.faculty_id AND course_name = IFNULL({row}.course_name, '');
+"""
+_FEEDBACK_ADD = ("INSERT OR IGNORE INTO feedback_stats (faculty_id, course_name) "
+                 "VALUES (NEW.faculty_id, IFNULL(NEW.course_name, ''));"
+                 + _FEEDBACK_DELTA.format(sign="1", row="NEW"))
+_FEEDBACK_REMOVE = _FEEDBACK_DELTA.format(sign="-1", row="OLD")
+
+FEEDBACK_STATS_TRIGGERS = {
+    "trg_feedback_stats_insert":
+        f"CREATE TRIGGER IF NOT EXISTS trg_feedback_stats_insert AFTER INSERT ON student_feedback "
+        f"BEGIN {_FEEDBACK_ADD} END",
+    "trg_feedback_stats_delete":
+        f"CREATE TRIGGER IF NOT EXISTS trg_feedback_stats_delete AFTER DELETE ON student_feedback "
+        f"BEGIN {_FEEDBACK_REMOVE} END",
+    "trg_feedback_stats_update":
+        f"CREATE TRIGGER IF NOT EXISTS trg_feedback_stats_update "
+        f"AFTER UPDATE OF faculty_id, course_name, rating, sentiment_label ON student_feedback "
+        f"BEGIN {_FEEDBACK_REMOVE} {_FEEDBACK_ADD} END",
+}
+
+MIGRATIONS = [
+    (1, "Base tables", [
+        """
+        CREATE TABLE IF NOT EXISTS faculty_master (
+            faculty_id INTEGER PRIMARY KEY,
+            name TEXT, designation TEXT, department TEXT, joining_date TEXT
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS research_records (
+            research_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            faculty_id INTEGER, publications_count INTEGER, patents_count INTEGER, projects_count INTEGER,
+            FOREIGN KEY(faculty_id) REFERENCES faculty_master(faculty_id)
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS student_feedback (
+            feedback_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            faculty_id INTEGER, course_name TEXT, rating INTEGER, feedback_comment TEXT, sentiment_label TEXT,
+            teaching_clarity_score INTEGER, engagement_score INTEGER, pace_score INTEGER,
+            FOREIGN KEY(faculty_id) REFERENCES faculty_master(faculty_id)
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS leave_records (
+            leave_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            faculty_id INTEGER, type TEXT, days_requested INTEGER, status TEXT
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS teaching_progress (
+            record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            faculty_id INTEGER, week_number INTEGER, teacher_completion_pct INTEGER,
+            student_avg_pct INTEGER, class_verdict TEXT
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS bonus_leaves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            faculty_id INTEGER, leave_type TEXT, extra_days INTEGER, granted_date TEXT
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS leave_balance (
+            faculty_id INTEGER PRIMARY KEY,
+            cl_balance INTEGER DEFAULT 10, sl_balance INTEGER DEFAULT 5, el_balance INTEGER DEFAULT 2
+        )""",
+    ]),
+    (2, "Indexes on faculty_id / status lookup columns", [
+        "CREATE INDEX IF NOT EXISTS idx_leave_records_faculty_status_type ON leave_records (faculty_id, status, type)",
+        "CREATE INDEX IF NOT EXISTS idx_leave_records_status ON leave_records (status)",
+        "CREATE INDEX IF NOT EXISTS idx_student_feedback_faculty ON student_feedback (faculty_id)",
+        "CREATE INDEX IF NOT EXISTS idx_teaching_progress_faculty_week ON teaching_progress (faculty_id, week_number)",
+        "CREATE INDEX IF NOT EXISTS idx_research_records_faculty ON research_records (faculty_id)",
+        "CREATE INDEX IF NOT EXISTS idx_bonus_leaves_faculty_type ON bonus_leaves (faculty_id, leave_type)",
+    ]),
+    (3, "Materialized leave ledger", [
+        """
+        CREATE TABLE IF NOT EXISTS leave_ledger (
+            faculty_id INTEGER NOT NULL,
+            leave_type TEXT NOT NULL,
+            allocated INTEGER NOT NULL,
+            bonus INTEGER NOT NULL DEFAULT 0,
+            used INTEGER NOT NULL DEFAULT 0,
+            pending INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (faculty_id, leave_type)
+        ) WITHOUT ROWID""",
+        _build_leave_ledger,
+    ]),
+    (4, "Index on faculty_master.department", [
+        "CREATE INDEX IF NOT EXISTS idx_faculty_master_department ON faculty_master (department)",
+    ]),
+    (5, "Index for keyset-paginated leave history", [
+        # Index entries carry the rowid, so this is ordered by leave_id within a faculty
+        "CREATE INDEX IF NOT EXISTS idx_leave_records_faculty ON leave_records (faculty_id)",
+    ]),
+    (6, "Per-faculty, per-course feedback aggregates", [
+        """
+        CREATE TABLE IF NOT EXISTS feedback_stats (
+            faculty_id INTEGER NOT NULL,
+            course_name TEXT NOT NULL,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            rated_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rating_1 INTEGER NOT NULL DEFAULT 0,
+            rating_2 INTEGER NOT NULL DEFAULT 0,
+            rating_3 INTEGER NOT NULL DEFAULT 0,
+            rating_4 INTEGER NOT NULL DEFAULT 0,
+            rating_5 INTEGER NOT NULL DEFAULT 0,
+            positive_count INTEGER NOT NULL DEFAULT 0,
+            neutral_count INTEGER NOT NULL DEFAULT 0,
+            negative_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (faculty_id, course_name)
+        ) WITHOUT ROWID""",
+        *FEEDBACK_STATS_TRIGGERS.values(),
+        _build_feedback_stats,
+    ]),
+    (7, "Background job queue", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL DEFAULT '{}',
+            owner TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            progress INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            message TEXT,
+            artifact_name TEXT,
+            artifact_mime TEXT,
+            artifact_bytes INTEGER,
+            worker TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            heartbeat_at TEXT,
+            finished_at TEXT,
+            expires_at TEXT,
+            downloaded_at TEXT
+        )""",
+        # Entries carry the rowid, so both serve "ORDER BY job_id" without a sort
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_owner ON jobs (owner)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    """Returns the highest applied migration number (0 for a fresh database)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY, description TEXT, applied_at TEXT
+        )
+    """)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate(conn, target=None):
+    """
+    Applies every pending migration up to `target` (default: latest).
+    Each step runs in its own IMMEDIATE transaction, so two processes
+    starting at once cannot apply the same step twice.
+    Returns the schema version after migrating.
+    """
+    target = LATEST_VERSION if target is None else target
+    current = get_schema_version(conn)
+    conn.commit()
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock: another process may have won the race
+            if conn.execute("SELECT 1 FROM schema_version WHERE version=?", (version,)).fetchone():
+                conn.rollback()
+                continue
+            changed = []
+            for step in statements:
+                if callable(step):
+                    changed.extend(step(conn) or ())
+                else:
+                    conn.execute(step)
+            conn.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                         (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if changed:
+            import db_utils
+            db_utils.invalidate_tables(*changed)
+
+    return get_schema_version(conn)
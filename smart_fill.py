@@ -2,6 +2,8 @@ import sqlite3
 import pandas as pd
 import os
 import random
+import schema_utils
+import db_utils
 
 # --- FILES ---
 DB_FILE = "academic_hr.db"
@@ -14,8 +16,14 @@ db_path = os.path.join(BASE_DIR, DB_FILE)
 print("🚀 STARTING SMART FEEDBACK FILL (10 REVIEWS PER FACULTY)...")
 
 conn = sqlite3.connect(db_path)
+schema_utils.migrate(conn)
 cursor = conn.cursor()
 
+# Bulk load: feedback_stats is rebuilt once at the end instead of per row.
+# One transaction from here to the commit, so a failure also rolls back the dropped triggers.
+conn.execute("BEGIN IMMEDIATE")
+db_utils.pause_feedback_stats(conn)
+
 # 1. CLEAR OLD TABLE
 cursor.execute("DELETE FROM student_feedback")
 print("🧹 Cleared student_feedback table.")
@@ -102,8 +110,10 @@ for _, row in df_faculty.iterrows():
         ))
         gen_count += 1
 
+db_utils.resume_feedback_stats(conn)
 conn.commit()
 conn.close()
+# A running app notices this commit through its data_version watcher (see db_utils)
 
 print(f"\n🏁 DONE!")
 print(f"✅ Real Records Loaded: {real_count}")
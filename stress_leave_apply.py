@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import threading
+import random
+import time
+import sys
+import db_utils as db
+import schema_utils
+
+# Hammers apply_for_leave from many threads (while an "HOD" thread approves and
+# rejects requests) and checks that no faculty member is ever overdrawn.
+# Works on a temporary copy of the database, so the real data is never touched.
+
+THREADS = 16
+SUBMITS_PER_THREAD = 100
+LEAVE_TYPES = ["CL", "SL"]
+
+print("🚀 STARTING LEAVE SUBMISSION STRESS TEST...")
+
+# 1. WORK ON A MIGRATED COPY
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "stress.db")
+shutil.copy(db.DB_FILE, db_path)
+db.set_engine(db.SQLiteFileEngine(db_path))
+
+conn = db.get_connection()
+schema_utils.migrate(conn)
+# Two brand-new faculty IDs, so every request competes for a full quota
+first_id = conn.execute("SELECT MAX(faculty_id) + 1 FROM leave_ledger").fetchone()[0]
+conn.close()
+faculty_ids = [first_id, first_id + 1]
+
+# 2. SUBMIT CONCURRENTLY
+accepted = []
+refused = []
+errors = []
+done = threading.Event()
+
+def submitter():
+    for _ in range(SUBMITS_PER_THREAD):
+        fid = random.choice(faculty_ids)
+        l_type = random.choice(LEAVE_TYPES)
+        days = random.randint(1, 3)
+        try:
+            ok, _ = db.apply_for_leave(fid, l_type, days)
+            (accepted if ok else refused).append(days)
+        except Exception as e:
+            errors.append(str(e))
+
+def approver():
+    # Decides on pending requests while submissions are still arriving
+    while not done.is_set():
+        conn = db.get_connection()
+        pending = conn.execute(
+            "SELECT leave_id FROM leave_records WHERE faculty_id IN (?, ?) AND status='Pending'",
+            faculty_ids).fetchall()
+        conn.close()
+        for (leave_id,) in pending[:5]:
+            db.update_leave_status(leave_id, random.choice(["Approved", "Rejected"]))
+        time.sleep(0.01)
+
+start = time.perf_counter()
+hod = threading.Thread(target=approver)
+hod.start()
+workers = [threading.Thread(target=submitter) for _ in range(THREADS)]
+for t in workers:
+    t.start()
+for t in workers:
+    t.join()
+done.set()
+hod.join()
+elapsed = time.perf_counter() - start
+
+# 3. CHECK FOR OVERDRAFTS
+conn = db.get_connection()
+overdrafts = []
+for fid in faculty_ids:
+    for l_type in LEAVE_TYPES:
+        booked = conn.execute("""
+            SELECT COALESCE(SUM(days_requested), 0) FROM leave_records
+            WHERE faculty_id=? AND type=? AND status IN ('Approved', 'Pending')
+        """, (fid, l_type)).fetchone()[0]
+        allowed = db.LEAVE_QUOTA[l_type]
+        if booked > allowed:
+            overdrafts.append((fid, l_type, booked, allowed))
+conn.close()
+drift = db.verify_leave_ledger()
+
+db.close_all_connections()
+shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# 4. REPORT
+total = THREADS * SUBMITS_PER_THREAD
+print(f"📊 {total} submissions from {THREADS} threads in {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+print(f"   Accepted: {len(accepted)}  Refused (no balance): {len(refused)}  Errors: {len(errors)}")
+
+if errors:
+    print(f"❌ First error: {errors[0]}")
+for fid, l_type, booked, allowed in overdrafts:
+    print(f"❌ OVERDRAFT: faculty {fid} {l_type} booked {booked} of {allowed} days")
+if not drift.empty:
+    print(f"❌ Leave ledger drifted on {len(drift)} rows.")
+
+if errors or overdrafts or not drift.empty:
+    sys.exit(1)
+print("✅ SUCCESS! Zero overdrafts and the ledger matches leave_records.")